@@ -1,10 +1,15 @@
-from model.ollama import get_ai_answer
+from model.ollama import LogSession, OllamaConfig
+from model.pipeline import request_move, request_log_move
+from model.pool import BackendPool, request_pool_move
 
 import pygame
-import os
-import re
 import copy
-from chessMove import isLegalMove, Piece, getAttackPoses
+from chessStatus import GameStatus
+from chessAI import chessMoveAI, EngineRequest, SearchLimits
+from game import Game, create_initial_board
+from chessRender import BoardRenderer
+from components.sprites import get_piece_atlas
+from components.text import render_text
 import time
 
 # Constants
@@ -14,6 +19,7 @@ SQUARE_SIZE = 640 // COLS
 WHITE_COLOR = (240, 217, 181)
 BLACK_COLOR = (181, 136, 99)
 DANGER_COLOR = (255, 100, 100)
+FONT_NAME, FONT_SIZE = None, 24     # pygame's default font
 ASSET_DIR = "assets/images"
 BUTTON_HISTORY = pygame.Rect(640, 10, 70, 30)
 BUTTON_BACK = pygame.Rect(640, 50, 30, 30)
@@ -21,116 +27,80 @@ BUTTON_FORWARD = pygame.Rect(680, 50, 30, 30)
 BUTTON_BEGINNER = pygame.Rect(640, 90, 80, 30)
 BUTTON_RESTART = pygame.Rect(640, 130, 80, 30)
 BUTTON_AI = pygame.Rect(640, 250, 80, 30)
-PIECE_VALUES = {
-    "king": 0,
-    "queen": 9,
-    "rook": 5,
-    "bishop": 3,
-    "knight": 3,
-    "pawn": 1,
-}
-
 BUTTON_SWAP = pygame.Rect(640, 170, 80, 30)
-
-
-def get_attack_board(board, attacker_color):
-    attack_board = [[False for _ in range(8)] for _ in range(8)]
-    for r1 in range(8):
-        for c1 in range(8):
-            piece = board[r1][c1]
-            if not piece or piece.color != attacker_color:
-                continue
-            for r2 in range(8):
-                for c2 in range(8):
-                    if r1 == r2 and c1 == c2:
-                        continue
-                    move_str = f"{piece.kind.capitalize()}-{chr(c1+97)}{8-r1}-{chr(c2+97)}{8-r2}"
-                    attack_poses = getAttackPoses(board, piece.kind.capitalize(), f"{chr(c1+97)}{8-r1}")
-
-                    for attackPos in attack_poses:
-                        x, y = attackPos
-                        attack_board[x][y] = True
-    return attack_board
-
-def is_king_in_check(board, color):
-    king_pos = None
-    for row in range(8):
-        for col in range(8):
-            piece = board[row][col]
-            if piece and piece.color == color and piece.kind == "king":
-                king_pos = (row, col)
-                break
-    if not king_pos:
-        return True  # King not found, technically in check
-
-    attack_board = get_attack_board(board, "black" if color == "white" else "white")
-    return attack_board[king_pos[0]][king_pos[1]]
-
-def is_king_in_check_after_move(board, from_pos, to_pos):
-    temp_board = copy.deepcopy(board)
-    r1 = 8 - int(from_pos[1])
-    c1 = ord(from_pos[0].lower()) - ord('a')
-    r2 = 8 - int(to_pos[1])
-    c2 = ord(to_pos[0].lower()) - ord('a')
-
-    piece = temp_board[r1][c1]
-    temp_board[r2][c2] = piece
-    temp_board[r1][c1] = None
-
-    if not piece:
-        return False
-
-    return is_king_in_check(temp_board, piece.color)
-
-def show_check_text(screen, font, board, turn):
-    pygame.draw.rect(screen, (0, 0, 0), (630, 140, 90, 20))  # clear area
-    if is_king_in_check(board, turn):
-        text = font.render("Check!", True, (255, 0, 0))
+PANEL_RECT = pygame.Rect(640, 0, 80, 640)
+FPS = 60                # frame cap while a piece is dragged
+IDLE_FPS = 15           # otherwise: enough for the clocks and polling the model
+AI_LIMITS = SearchLimits(time_ms=1000)
+AI_BACKEND = "engine"   # "engine" for the local search, "ollama" for the language model,
+                        # "ollama-log" for the model fed the move log in one running conversation,
+                        # "ollama-pool" to ask every MODEL_BACKENDS entry at once and take the first legal answer
+MODEL_DEADLINE = 20.0   # seconds before a model request falls back to the engine
+MODEL_ATTEMPTS = 3      # model answers tried before the engine takes over
+MODEL_BACKENDS = [
+    OllamaConfig(model="llama3.2"),
+    OllamaConfig(model="qwen2.5", prompt_format="fen"),
+]
+
+
+def opponent_of(color):
+    return "black" if color == "white" else "white"
+
+def label(text, color):
+    return render_text(FONT_NAME, FONT_SIZE, text, color)
+
+def show_check_text(screen, in_check):
+    pygame.draw.rect(screen, (0, 0, 0), (640, 140, 80, 20))  # clear area
+    if in_check:
+        text = label("Check!", (255, 0, 0))
         screen.blit(text, (645, 140))
 
-def draw_board(screen, attack_board=None):
-    for row in range(ROWS):
-        for col in range(COLS):
-            color = WHITE_COLOR if (row + col) % 2 == 0 else BLACK_COLOR
-            if attack_board and attack_board[row][col]:
-                color = DANGER_COLOR
-            pygame.draw.rect(screen, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
 def load_piece_images():
-    piece_images = {}
-    for color in ['white', 'black']:
-        for piece_type in ['king', 'queen', 'rook', 'bishop', 'knight', 'pawn']:
-            filename = f"{color}-{piece_type}.png"
-            full_path = os.path.join(ASSET_DIR, filename)
-            try:
-                image = pygame.image.load(full_path)
-                image = pygame.transform.smoothscale(image, (SQUARE_SIZE, SQUARE_SIZE))
-                piece_images[f"{color}-{piece_type}"] = image
-            except pygame.error:
-                print(f"Could not load image: {full_path}")
-    return piece_images
-
-def draw_pieces(screen, board, piece_images, dragging_piece=None, dragging_pos=None):
-    for row in range(ROWS):
-        for col in range(COLS):
-            piece = board[row][col]
-            if not piece:
-                continue
-            if dragging_piece and dragging_piece == (row, col):
-                continue
-            key = f"{piece.color}-{piece.kind}"
-            image = piece_images.get(key)
-            if image:
-                screen.blit(image, (col * SQUARE_SIZE, row * SQUARE_SIZE))
-
-    if dragging_piece and dragging_pos:
-        row, col = dragging_piece
-        piece = board[row][col]
-        key = f"{piece.color}-{piece.kind}"
-        image = piece_images.get(key)
-        if image:
-            rect = image.get_rect(center=dragging_pos)
-            screen.blit(image, rect)
+    # 한 번만 읽고 칸 크기별로 변환해 둔 아틀라스를 재사용
+    return get_piece_atlas(ASSET_DIR).images(SQUARE_SIZE)
+
+def format_clock(seconds):
+    return f"{int(seconds//60):02}:{int(seconds%60):02}"
+
+def format_tablebase(result, color):
+    """Tablebase result as white sees it: "TB #3" white mates in 3, "TB #-3" black does."""
+    if result is None:
+        return ""
+    if result.wdl == 0:
+        return "TB draw"
+    moves = (result.plies + 1) // 2
+    white_wins = (result.wdl > 0) == (color == "white")
+    return f"TB #{moves}" if white_wins else f"TB #-{moves}"
+
+def draw_panel(screen, result_message, in_check, game_over, white_clock, black_clock, tablebase=""):
+    pygame.draw.rect(screen, (200, 200, 200), BUTTON_HISTORY)
+    pygame.draw.rect(screen, (180, 180, 180), BUTTON_BACK)
+    pygame.draw.rect(screen, (180, 180, 180), BUTTON_FORWARD)
+    pygame.draw.rect(screen, (180, 255, 180), BUTTON_BEGINNER)
+    screen.blit(label("History", (0, 0, 0)), (BUTTON_HISTORY.x + 5, BUTTON_HISTORY.y + 5))
+    screen.blit(label("<", (0, 0, 0)), (BUTTON_BACK.x + 8, BUTTON_BACK.y + 5))
+    screen.blit(label(">", (0, 0, 0)), (BUTTON_FORWARD.x + 8, BUTTON_FORWARD.y + 5))
+    screen.blit(label("Beginner", (0, 0, 0)), (BUTTON_BEGINNER.x + 2, BUTTON_BEGINNER.y + 5))
+
+    pygame.draw.rect(screen, (200, 200, 255), BUTTON_AI)
+    pygame.draw.rect(screen, (255, 220, 120), BUTTON_SWAP)
+    screen.blit(label("AI move", (0, 0, 0)), (650, 255))
+    screen.blit(label("Swap", (0, 0, 0)), (655, 175))
+    pygame.draw.rect(screen, (255, 255, 255), (640, 300, 80, 50))  # clear time display background
+    screen.blit(label(result_message, (255, 0, 0)), (645, 205))
+
+    screen.blit(label(f"W: {white_clock}", (0,0,0)), (640, 300))
+    screen.blit(label(f"B: {black_clock}", (0,0,0)), (640, 320))
+    pygame.draw.rect(screen, (255, 255, 255), (640, 350, 80, 20))
+    if tablebase:
+        screen.blit(label(tablebase, (0, 0, 160)), (640, 350))
+
+    if game_over:
+        pygame.draw.rect(screen, (255, 200, 200), (640, 210, 80, 30))
+        pygame.draw.rect(screen, (0, 0, 0), (640, 200, 80, 30))
+        screen.blit(label("Restart", (0, 0, 0)), (645, 215))
+
+    show_check_text(screen, in_check)
 
 def print_board(board):
     print("\nCurrent Board State:")
@@ -141,311 +111,126 @@ def print_board(board):
 def index_to_pos(row, col):
     return f"{chr(col + ord('a'))}{8 - row}"
 
-def is_king_checkmate(board, attacker_color):
-    """
-    Return True if the given color's king is in checkmate.
-    """
-    if not is_king_in_check(board, attacker_color):
-        return False
-
-    # check all possible moves of all own pieces
-    for r1 in range(8):
-        for c1 in range(8):
-            piece = board[r1][c1]
-            if not piece or piece.color != attacker_color:
-                continue
-            from_pos = f"{chr(c1 + ord('a'))}{8 - r1}"
-            for r2 in range(8):
-                for c2 in range(8):
-                    if r1 == r2 and c1 == c2:
-                        continue
-                    to_pos = f"{chr(c2 + ord('a'))}{8 - r2}"
-                    move_str = f"{piece.kind.capitalize()}-{from_pos}-{to_pos}"
-                    if isLegalMove(board, move_str):
-                        temp_board = copy.deepcopy(board)
-                        temp_board[r2][c2] = temp_board[r1][c1]
-                        temp_board[r1][c1] = None
-                        if not is_king_in_check(temp_board, attacker_color):
-                            return False  # at least one valid move that escapes check
-    return True  # no valid move escapes check
-
-
-    from_row, from_col = king_pos
-    from_pos = f"{chr(from_col + ord('a'))}{8 - from_row}"
-
-    for dr in [-1, 0, 1]:
-        for dc in [-1, 0, 1]:
-            if dr == 0 and dc == 0:
-                continue
-            to_row = from_row + dr
-            to_col = from_col + dc
-            if 0 <= to_row < 8 and 0 <= to_col < 8:
-                to_pos = f"{chr(to_col + ord('a'))}{8 - to_row}"
-                move_str = f"King-{from_pos}-{to_pos}"
-                if isLegalMove(board, move_str) and not is_king_in_check_after_move(board, from_pos, to_pos):
-                    # simulate move
-                    temp_board = copy.deepcopy(board)
-                    temp_board[to_row][to_col] = temp_board[from_row][from_col]
-                    temp_board[from_row][from_col] = None
-                    if not is_king_in_check(temp_board, attacker_color):
-                        return False  # has a safe move
-    return True  # no safe move
-
-def is_stalemate(board, color):
-    """
-    Return True if the player of 'color' has no legal moves and is NOT in check (stalemate).
-    """
-    # 1. 킹이 체크 상태이면 스테일메이트 아님
-    if is_king_in_check(board, color):
-        return False
-
-    # 2. 자신의 모든 말에 대해 가능한 이동이 1개라도 있는지 확인
-    for r1 in range(8):
-        for c1 in range(8):
-            piece = board[r1][c1]
-            if not piece or piece.color != color:
-                continue
-            from_pos = f"{chr(c1 + ord('a'))}{8 - r1}"
-            for r2 in range(8):
-                for c2 in range(8):
-                    if r1 == r2 and c1 == c2:
-                        continue
-                    to_pos = f"{chr(c2 + ord('a'))}{8 - r2}"
-                    move_str = f"{piece.kind.capitalize()}-{from_pos}-{to_pos}"
-                    if isLegalMove(board, move_str):
-                        temp_board = copy.deepcopy(board)
-                        temp_board[r2][c2] = temp_board[r1][c1]
-                        temp_board[r1][c1] = None
-                        if not is_king_in_check(temp_board, color):
-                            return False  # valid move exists
-    return True  # no valid moves and not in check → stalemate
-
-def is_game_ended(board, color):
-    return is_king_checkmate(board, color) or is_stalemate(board, color)
-
-def evaluate_board(board, color):
-    """Return material score from the perspective of `color`."""
-    score = 0
-    for row in board:
-        for piece in row:
-            if piece:
-                value = PIECE_VALUES.get(piece.kind, 0)
-                if piece.color == color:
-                    score += value
-                else:
-                    score -= value
-    return score
-
-def get_best_move(board, color, game_state):
-    """Return best move_str for the given color based on simple evaluation."""
-    best_score = float('-inf')
-    best_move = None
-
-    for r1 in range(8):
-        for c1 in range(8):
-            piece = board[r1][c1]
-            if not piece or piece.color != color:
-                continue
-
-            from_pos = f"{chr(c1 + ord('a'))}{8 - r1}"
-            for r2 in range(8):
-                for c2 in range(8):
-                    if r1 == r2 and c1 == c2:
-                        continue
-                    to_pos = f"{chr(c2 + ord('a'))}{8 - r2}"
-                    move_str = f"{piece.kind.capitalize()}-{from_pos}-{to_pos}"
+def is_game_ended(board, color, game_state=None):
+    status = GameStatus()
+    status.refresh(board, game_state, color)
+    return status.game_over
 
-                    if isLegalMove(board, move_str, game_state):
-                        # simulate move
-                        temp_board = copy.deepcopy(board)
-                        temp_board[r2][c2] = temp_board[r1][c1]
-                        temp_board[r1][c1] = None
+def engine_fallback(board, color, game_state):
+    """Return a zero-argument callable that searches a snapshot of the position."""
+    snapshot, state = copy.deepcopy(board), dict(game_state)
+    return lambda: chessMoveAI(snapshot, color, AI_LIMITS, state)
 
-                        score = evaluate_board(temp_board, color)
-                        if score > best_score:
-                            best_score = score
-                            best_move = move_str
-
-    return best_move
+def engine_request(board, color, game_state):
+    """Search on the engine's worker thread so the window keeps drawing; poll it for the move string."""
+    return EngineRequest(board, color, AI_LIMITS, game_state)
 
 def run_chess_gui(board):
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Chess with Beginner Mode")
     piece_images = load_piece_images()
-    font = pygame.font.SysFont(None, 24)
+    renderer = BoardRenderer(screen, SQUARE_SIZE, WHITE_COLOR, BLACK_COLOR, DANGER_COLOR, PANEL_RECT)
+    clock = pygame.time.Clock()
 
-    white_time = 600  # seconds (10 minutes)
-    black_time = 600
+    # 규칙, 기록, 시계, 결과는 Game이 관리하고 여기서는 입력과 그리기만 담당
+    game = Game(board)
     last_time = time.time()
 
     dragging = False
     dragging_piece = None
     mouse_x, mouse_y = 0, 0
-    turn_count = 1
-    current_turn = "white"
-    move_history = []
-    board_history = [copy.deepcopy(board)]
-    current_state_index = 0
-    game_state = {
-        "lastMove": None,
-        "turnCount": turn_count  # now storing numeric turn
-    }
     beginner_mode = False
 
     running = True
-    game_over = False
     swap_mode = False
-    swap_used = {"white": False, "black": False}
     swap_selection = []
-    result_message = ""
-    while running:
-        attack_board = get_attack_board(board, 'black' if current_turn == 'white' else 'white') if beginner_mode else None
-
-        draw_board(screen, attack_board)
-        draw_pieces(screen, board, piece_images, dragging_piece, (mouse_x, mouse_y) if dragging else None)
-
-        pygame.draw.rect(screen, (200, 200, 200), BUTTON_HISTORY)
-        pygame.draw.rect(screen, (180, 180, 180), BUTTON_BACK)
-        pygame.draw.rect(screen, (180, 180, 180), BUTTON_FORWARD)
-        pygame.draw.rect(screen, (180, 255, 180), BUTTON_BEGINNER)
-        screen.blit(font.render("History", True, (0, 0, 0)), (BUTTON_HISTORY.x + 5, BUTTON_HISTORY.y + 5))
-        screen.blit(font.render("<", True, (0, 0, 0)), (BUTTON_BACK.x + 8, BUTTON_BACK.y + 5))
-        screen.blit(font.render(">", True, (0, 0, 0)), (BUTTON_FORWARD.x + 8, BUTTON_FORWARD.y + 5))
-        screen.blit(font.render("Beginner", True, (0, 0, 0)), (BUTTON_BEGINNER.x + 2, BUTTON_BEGINNER.y + 5))
+    danger_board = None
+    danger_version = None
+    pending_ai = None
+    ai_move_str = None
+    # 되돌리기 후에는 기록이 달라지므로 세션이 알아서 다시 만듦
+    log_session = LogSession()
+    model_pool = BackendPool(MODEL_BACKENDS) if AI_BACKEND == "ollama-pool" else None
+
+    def model_options():
+        return dict(fallback=engine_fallback(game.board, game.turn, game.state),
+                    max_attempts=MODEL_ATTEMPTS, time_budget=MODEL_DEADLINE)
+
+    # AI_BACKEND -> 지금 국면에 대한 요청을 시작하는 함수, 모르는 값이면 엔진
+    ai_requests = {
+        "ollama": lambda: request_move(game.board, [str(m) for m in game.legal_moves()], game.turn,
+                                       **model_options()),
+        "ollama-log": lambda: request_log_move(log_session, game.move_log(),
+                                               [str(m) for m in game.legal_moves()], game.turn,
+                                               **model_options()),
+        "ollama-pool": lambda: request_pool_move(model_pool, game.board, [str(m) for m in game.legal_moves()],
+                                                 game.turn, **model_options()),
+        "engine": lambda: engine_request(game.board, game.turn, game.state),
+    }
+    request_ai = ai_requests.get(AI_BACKEND, ai_requests["engine"])
 
-        pygame.draw.rect(screen, (200, 200, 255), BUTTON_AI)
-        pygame.draw.rect(screen, (255, 220, 120), BUTTON_SWAP)
-        screen.blit(font.render("AI move", True, (0, 0, 0)), (650, 255))
-        screen.blit(font.render("Swap", True, (0, 0, 0)), (655, 175))
-        pygame.draw.rect(screen, (255, 255, 255), (630, 300, 90, 50))  # clear time display background
-        screen.blit(font.render(result_message, True, (255, 0, 0)), (635, 205))
+    while running:
+        board, current_turn = game.board, game.turn
+        # 국면이 바뀐 경우에만 다시 계산
+        game.refresh()
+        if danger_version != game.version:
+            danger_board = game.attack_map.attack_board(opponent_of(current_turn))
+            danger_version = game.version
+        attack_board = danger_board if beginner_mode else None
 
-        show_check_text(screen, font, board, current_turn)
+        renderer.draw_board(board, piece_images, attack_board, dragging_piece, (mouse_x, mouse_y) if dragging else None)
 
         # 시간 표시
-        elapsed = time.time() - last_time
-        if not game_over:
-            if current_turn == "white":
-                white_time -= elapsed
-            else:
-                black_time -= elapsed
+        game.tick(time.time() - last_time)
         last_time = time.time()
 
-        screen.blit(font.render(f"W: {int(white_time//60):02}:{int(white_time%60):02}", True, (0,0,0)), (640, 300))
-        screen.blit(font.render(f"B: {int(black_time//60):02}:{int(black_time%60):02}", True, (0,0,0)), (640, 320))
-
-        if white_time <= 0:
-            result_message = "Black wins on time"
-            game_over = True
-        elif black_time <= 0:
-            result_message = "White wins on time"
-            game_over = True
-        if not game_over:
-            if is_king_in_check(board, current_turn):
-                if is_king_checkmate(board, current_turn):
-                    result_message = f"{('White' if current_turn == 'black' else 'Black')} wins by checkmate"
-                    game_over = True
-            elif is_stalemate(board, current_turn):
-                result_message = "Stalemate"
-                game_over = True
-
-        if game_over:
-            pygame.draw.rect(screen, (255, 200, 200), (640, 210, 80, 30))
-            pygame.draw.rect(screen, (0, 0, 0), (630, 200, 90, 30))
-            screen.blit(font.render("Restart", True, (0, 0, 0)), (645, 215))
-
-        show_check_text(screen, font, board, current_turn)
-        pygame.display.flip()
+        # 패널 내용(시계는 초 단위)이 바뀐 경우에만 다시 그림
+        panel = (game.result_message, game.status.in_check, game.game_over,
+                 format_clock(game.times["white"]), format_clock(game.times["black"]),
+                 format_tablebase(game.status.tablebase, game.turn))
+        renderer.draw_panel(panel, lambda surface: draw_panel(surface, *panel))
+        renderer.flush()
+        clock.tick(FPS if dragging else IDLE_FPS)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.invalidate()
+
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if BUTTON_AI.collidepoint(event.pos):
-                    if not game_over and current_turn == "black":
-                        while True:
-                            move_str = get_best_move(board, current_turn, game_state)
-                            print(move_str)
-                            try:
-                                _, from_pos, to_pos = move_str.split("-")
-                                from_row = 8 - int(from_pos[1])
-                                from_col = ord(from_pos[0]) - ord('a')
-                                to_row = 8 - int(to_pos[1])
-                                to_col = ord(to_pos[0]) - ord('a')
-                                piece = board[from_row][from_col]
-                                if piece and isLegalMove(board, move_str, game_state):
-                                    break
-                            except:
-                                print("ERROR")
-                                continue
-                        try:
-                            _, from_pos, to_pos = move_str.split("-")
-                            from_row = 8 - int(from_pos[1])
-                            from_col = ord(from_pos[0]) - ord('a')
-                            to_row = 8 - int(to_pos[1])
-                            to_col = ord(to_pos[0]) - ord('a')
-                            piece = board[from_row][from_col]
-                            if piece:
-                                if isLegalMove(board, move_str, game_state):
-                                    board[to_row][to_col] = piece
-                                    board[from_row][from_col] = None
-
-                                    # 프로모션 (AI 수)
-                                    if piece.kind == "pawn" and (to_row == 0 or to_row == 7):
-                                        board[to_row][to_col] = Piece(piece.color, "queen")
-                                    game_state["turnCount"] = turn_count  # Removed lastMove usage
-                                    move_history.append(move_str)
-                                    board_history = board_history[:current_state_index + 1]
-                                    board_history.append(copy.deepcopy(board))
-                                    current_state_index += 1
-
-                                    print_board(board)
-
-                                    turn_count += 1
-                            current_turn = "black" if current_turn == "white" else "white"
-                            last_time = time.time()
-                        except Exception as e:
-                            print("AI move error:", e)
-
-                print(board)
-                if game_over and pygame.Rect(640, 170, 80, 30).collidepoint(event.pos):
-                    board = create_initial_board()
-                    piece_images = load_piece_images()
+                    if not game.game_over and game.turn == "black" and pending_ai is None:
+                        pending_ai = request_ai()
+                if game.game_over and pygame.Rect(640, 170, 80, 30).collidepoint(event.pos):
+                    if pending_ai is not None:
+                        pending_ai.cancel()
+                        pending_ai = None
+                    game.restart()
                     dragging = False
                     dragging_piece = None
                     mouse_x, mouse_y = 0, 0
-                    turn_count = 1
-                    current_turn = "white"
-                    move_history.clear()
-                    board_history = [copy.deepcopy(board)]
-                    current_state_index = 0
-                    # Removed lastMove reference
-                    game_state["turnCount"] = turn_count
-                    game_state["turnCount"] = turn_count
-                    game_over = False
-                    result_message = ""
+                    log_session.reset()
                     continue
                 if BUTTON_HISTORY.collidepoint(event.pos):
                     print("\nMove History:")
-                    for move in move_history:
+                    for move in game.move_log():
                         print(move)
                     continue
-                elif BUTTON_BACK.collidepoint(event.pos):
-                    if current_state_index > 0:
-                        current_state_index -= 1
-                        board = copy.deepcopy(board_history[current_state_index])
-                        current_turn = "white" if current_state_index % 2 == 0 else "black"
-                    continue
-                elif BUTTON_FORWARD.collidepoint(event.pos):
-                    if current_state_index < len(board_history) - 1:
-                        current_state_index += 1
-                        board = copy.deepcopy(board_history[current_state_index])
-                        current_turn = "white" if current_state_index % 2 == 0 else "black"
+                elif BUTTON_BACK.collidepoint(event.pos) or BUTTON_FORWARD.collidepoint(event.pos):
+                    target = game.history.cursor + (-1 if BUTTON_BACK.collidepoint(event.pos) else 1)
+                    if 0 <= target <= len(game.history):
+                        if pending_ai is not None:
+                            pending_ai.cancel()
+                            pending_ai = None
+                        game.seek(target)
+                        swap_mode = False
+                        swap_selection.clear()
                     continue
                 elif BUTTON_SWAP.collidepoint(event.pos):
-                    if not swap_used[current_turn]:
+                    if game.can_swap():
                         swap_mode = not swap_mode
                         swap_selection.clear()
                     continue
@@ -455,20 +240,22 @@ def run_chess_gui(board):
 
                 col, row = event.pos[0] // SQUARE_SIZE, event.pos[1] // SQUARE_SIZE
                 if 0 <= row < 8 and 0 <= col < 8:
-                    if game_over:
+                    if game.game_over:
                         continue
-                    if swap_mode and not swap_used[current_turn]:
-                        if board[row][col] and board[row][col].color == current_turn and board[row][col].kind != "king":
+                    piece = game.board[row][col]
+                    if swap_mode and game.can_swap():
+                        if piece and piece.color == game.turn and piece.kind != "king":
                             swap_selection.append((row, col))
                             if len(swap_selection) == 2:
-                                r1, c1 = swap_selection[0]
-                                r2, c2 = swap_selection[1]
-                                board[r1][c1], board[r2][c2] = board[r2][c2], board[r1][c1]
-                                swap_used[current_turn] = True
+                                # 스왑 전 국면으로 계산 중인 AI 수는 버림
+                                if pending_ai is not None:
+                                    pending_ai.cancel()
+                                    pending_ai = None
+                                game.swap(*swap_selection)
                                 swap_mode = False
                                 swap_selection.clear()
                         continue
-                    if board[row][col] and board[row][col].color == current_turn:
+                    if piece and piece.color == game.turn:
                         dragging = True
                         dragging_piece = (row, col)
                         mouse_x, mouse_y = event.pos
@@ -477,42 +264,17 @@ def run_chess_gui(board):
                 col, row = event.pos[0] // SQUARE_SIZE, event.pos[1] // SQUARE_SIZE
                 if 0 <= row < 8 and 0 <= col < 8:
                     from_row, from_col = dragging_piece
-                    piece = board[from_row][from_col]
+                    piece = game.board[from_row][from_col]
                     if piece:
                         move_str = f"{piece.kind.capitalize()}-{index_to_pos(from_row, from_col)}-{index_to_pos(row, col)}"
-                        if isLegalMove(board, move_str, game_state) and current_state_index == len(board_history) - 1 and not is_king_in_check_after_move(board, index_to_pos(from_row, from_col), index_to_pos(row, col)):
-                            if piece.kind == "king" and abs(col - from_col) == 2:
-                                rook_from = 0 if col < from_col else 7
-                                rook_to = from_col - 1 if col < from_col else from_col + 1
-                                board[from_row][rook_to] = board[from_row][rook_from]
-                                board[from_row][rook_from] = None
-                                board[from_row][rook_to].has_moved = True
-
-                            if piece.kind == "pawn" and col != from_col and board[row][col] is None:
-                                board[from_row][col] = None
-
-                            board[row][col] = piece
-                            board[from_row][from_col] = None
-
-                            # 프로모션 (사용자 수)
-                            if piece.kind == "pawn" and (row == 0 or row == 7):
-                                board[row][col] = Piece(piece.color, "queen")
-
-                            if piece.kind in ["king", "rook"]:
-                                piece.has_moved = True
-                            if piece.kind == "pawn" and abs(row - from_row) == 2:
-                                piece.double_move_turn = turn_count
-
-                            game_state["turnCount"] = turn_count  # Removed lastMove usage
-                            move_history.append(move_str)
-                            board_history = board_history[:current_state_index + 1]
-                            board_history.append(copy.deepcopy(board))
-                            current_state_index += 1
-
-                            print_board(board)
-
-                            turn_count += 1
-                            current_turn = "black" if current_turn == "white" else "white"
+                        game.refresh()
+                        move = game.status.find_move(from_row, from_col, row, col)
+                        if move and game.history.at_end:
+                            if pending_ai is not None:
+                                pending_ai.cancel()
+                                pending_ai = None
+                            game.play(move)
+                            print_board(game.board)
                         else:
                             print(f"Illegal move or not at latest state: {move_str}")
                 dragging = False
@@ -521,18 +283,34 @@ def run_chess_gui(board):
             elif event.type == pygame.MOUSEMOTION and dragging:
                 mouse_x, mouse_y = event.pos
 
-    pygame.quit()
+        # 모델 응답은 매 프레임 확인만 하고 기다리지 않음
+        if pending_ai is not None and pending_ai.done():
+            if not pending_ai.cancelled:
+                selection = pending_ai.answer
+                if selection is None:
+                    print("AI move request failed:", pending_ai.error)
+                elif isinstance(selection, str):
+                    # 엔진 탐색은 수 문자열을 그대로 돌려줌
+                    ai_move_str = selection
+                else:
+                    print("AI move:", selection.summary())
+                    if model_pool is not None:
+                        print(model_pool.report())
+                    ai_move_str = selection.move
+            pending_ai = None
+
+        if ai_move_str:
+            move = game.find_move(ai_move_str)
+            if move:
+                game.play(move)
+                print_board(game.board)
+                last_time = time.time()
+            else:
+                print("AI move error:", ai_move_str)
+            ai_move_str = None
 
+    pygame.quit()
 
-def create_initial_board():
-    board = [[None for _ in range(8)] for _ in range(8)]
-    order = ["rook", "knight", "bishop", "queen", "king", "bishop", "knight", "rook"]
-    for i in range(8):
-        board[0][i] = Piece("black", order[i])
-        board[1][i] = Piece("black", "pawn")
-        board[6][i] = Piece("white", "pawn")
-        board[7][i] = Piece("white", order[i])
-    return board
 
 if __name__ == "__main__":
     run_chess_gui(create_initial_board())
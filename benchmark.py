@@ -0,0 +1,160 @@
+"""
+Micro-benchmarks for the rules, attack map and engine entry points the GUI
+and selfplay use, and the string-board helpers in chess.py, run over a
+fixed corpus of positions without opening a window.
+
+    python -m benchmark                          # all cases, writes benchmark.json
+    python -m benchmark -k checkmate -n 500      # only matching cases
+    python -m benchmark --cold                   # clear position caches before every call
+    python -m benchmark -o before.json           # keep runs side by side for diffing
+
+Each case reports mean, p50 and p99 wall time per call and the peak
+memory of one call: how far traced memory (tracemalloc) rose above its
+level before the call.  That is the most the call held at once, not the
+total it allocated, since memory freed during the call is reused.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import chess
+from chessAI import chessMoveAI, evaluate, SearchLimits
+from chessAttack import AttackMap
+from chessMove import STATUS_CACHE
+from chessPosition import Position
+from chessStatus import GameStatus
+from perft import POSITIONS, board_from_fen
+
+# extra positions on top of the perft set: mate, stalemate, bare endgame
+CORPUS = {name: fen for name, (fen, _) in POSITIONS.items()}
+CORPUS.update({
+    "fools_mate": "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3",
+    "stalemate": "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1",
+    "kqk": "8/8/8/4k3/8/8/8/4K2Q w - - 0 1",
+})
+
+# one ply, so the case times move generation and evaluation rather than search
+BEST_MOVE_LIMITS = SearchLimits(time_ms=None, depth=1)
+
+
+def string_board(board):
+    """chess.py works on "white-pawn" strings with "" for empty squares."""
+    return [[str(piece) if piece else "" for piece in row] for row in board]
+
+
+def build_cases():
+    """Return a list of (name, position name, setup) where setup() gives a zero-arg call."""
+    cases = []
+    for pos_name, fen in CORPUS.items():
+        board, state = board_from_fen(fen)
+        color = state["turn"]
+        state["turnCount"] = 1
+        position = Position.from_fen(fen)
+        plain = [m for m in position.legal_moves() if not m.flag and not m.promotion]
+        squares = [f"{chr(c + 97)}{8 - r}" for r in range(8) for c in range(8)]
+
+        cases += [
+            ("AttackMap.attack_board", pos_name,
+             lambda b=board, c=color: lambda: AttackMap(b).attack_board("black" if c == "white" else "white")),
+            ("GameStatus.refresh", pos_name,
+             lambda b=board, c=color, s=state: lambda: GameStatus().refresh(b, s, c)),
+            ("chessAI.evaluate", pos_name,
+             lambda p=position: lambda: evaluate(p)),
+            ("chessAI.chessMoveAI", pos_name,
+             lambda b=board, c=color, s=state: lambda: chessMoveAI(b, c, BEST_MOVE_LIMITS, s,
+                                                                    use_book=False, verbose=False)),
+            ("chess.square_to_coords", pos_name,
+             lambda sq=squares: lambda: [chess.square_to_coords(s) for s in sq]),
+        ]
+        if plain:
+            move = plain[len(plain) // 2]
+            sboard = string_board(board)
+
+            def move_piece_setup(sb=sboard, m=move):
+                fresh = [row[:] for row in sb]
+                return lambda: chess.move_piece(fresh, [m.kind, m.from_pos, m.to_pos])
+
+            cases.append(("chess.move_piece", pos_name, move_piece_setup))
+    return cases
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(setup, iterations, warmup, cold):
+    for _ in range(warmup):
+        setup()()
+
+    times = []
+    for _ in range(iterations):
+        if cold:
+            STATUS_CACHE.clear()
+        call = setup()
+        started = time.perf_counter_ns()
+        call()
+        times.append(time.perf_counter_ns() - started)
+
+    # memory pass kept separate so tracing does not skew the timings
+    peaks = []
+    tracemalloc.start()
+    for _ in range(max(1, iterations // 10)):
+        if cold:
+            STATUS_CACHE.clear()
+        call = setup()
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        call()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    times.sort()
+    return {
+        "calls": iterations,
+        "mean_us": statistics.fmean(times) / 1000,
+        "p50_us": percentile(times, 0.50) / 1000,
+        "p99_us": percentile(times, 0.99) / 1000,
+        "peak_bytes": statistics.fmean(peaks),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rule helper micro-benchmarks")
+    parser.add_argument("-n", "--iterations", type=int, default=100)
+    parser.add_argument("-w", "--warmup", type=int, default=5)
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON results file")
+    parser.add_argument("--cold", action="store_true", help="clear position caches before each call")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'case':<26}{'position':<12}{'mean us':>12}{'p50 us':>12}{'p99 us':>12}{'peak B':>10}")
+    for name, pos_name, setup in build_cases():
+        if args.filter not in name:
+            continue
+        row = {"case": name, "position": pos_name}
+        row.update(measure(setup, args.iterations, args.warmup, args.cold))
+        results.append(row)
+        print(f"{name:<26}{pos_name:<12}{row['mean_us']:>12.1f}{row['p50_us']:>12.1f}"
+              f"{row['p99_us']:>12.1f}{row['peak_bytes']:>10.0f}")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "cold": args.cold,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
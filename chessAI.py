@@ -1,7 +1,380 @@
-from piece import Piece
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Optional
 
+from piece import Piece
+from chessBook import get_book
+from chessMove import position_from_board
+from chessPosition import Position, Move, iter_bits
+from chessTablebase import get_tablebase
+from chessTransposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# centipawns, indexed like chessPosition.KINDS
+PIECE_VALUES = (100, 320, 330, 500, 900, 0)
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000     # scores beyond this are mates
+INFINITY = 10 ** 9
+TIME_CHECK_INTERVAL = 512
+
+# piece-square tables from white's point of view, index 0 = a8;
+# black looks them up with the square mirrored (sq ^ 56)
+PST = (
+    (  0,   0,   0,   0,   0,   0,   0,   0,
+      50,  50,  50,  50,  50,  50,  50,  50,
+      10,  10,  20,  30,  30,  20,  10,  10,
+       5,   5,  10,  25,  25,  10,   5,   5,
+       0,   0,   0,  20,  20,   0,   0,   0,
+       5,  -5, -10,   0,   0, -10,  -5,   5,
+       5,  10,  10, -20, -20,  10,  10,   5,
+       0,   0,   0,   0,   0,   0,   0,   0),
+    (-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20,   0,   0,   0,   0, -20, -40,
+     -30,   0,  10,  15,  15,  10,   0, -30,
+     -30,   5,  15,  20,  20,  15,   5, -30,
+     -30,   0,  15,  20,  20,  15,   0, -30,
+     -30,   5,  10,  15,  15,  10,   5, -30,
+     -40, -20,   0,   5,   5,   0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50),
+    (-20, -10, -10, -10, -10, -10, -10, -20,
+     -10,   0,   0,   0,   0,   0,   0, -10,
+     -10,   0,   5,  10,  10,   5,   0, -10,
+     -10,   5,   5,  10,  10,   5,   5, -10,
+     -10,   0,  10,  10,  10,  10,   0, -10,
+     -10,  10,  10,  10,  10,  10,  10, -10,
+     -10,   5,   0,   0,   0,   0,   5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20),
+    (  0,   0,   0,   0,   0,   0,   0,   0,
+       5,  10,  10,  10,  10,  10,  10,   5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+       0,   0,   0,   5,   5,   0,   0,   0),
+    (-20, -10, -10,  -5,  -5, -10, -10, -20,
+     -10,   0,   0,   0,   0,   0,   0, -10,
+     -10,   0,   5,   5,   5,   5,   0, -10,
+      -5,   0,   5,   5,   5,   5,   0,  -5,
+       0,   0,   5,   5,   5,   5,   0,  -5,
+     -10,   5,   5,   5,   5,   5,   0, -10,
+     -10,   0,   5,   0,   0,   0,   0, -10,
+     -20, -10, -10,  -5,  -5, -10, -10, -20),
+    (-30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+      20,  20,   0,   0,   0,   0,  20,  20,
+      20,  30,  10,   0,   0,  10,  30,  20),
+)
+
+
+@dataclass
+class SearchLimits:
+    """Stop at whichever comes first: `time_ms`, `nodes` or `depth`."""
+    time_ms: Optional[float] = 1000
+    nodes: Optional[int] = None
+    depth: int = 32
+
+
+@dataclass
+class SearchResult:
+    move: Optional[Move]
+    score: int          # centipawns for the side to move
+    depth: int          # last fully searched depth
+    nodes: int
+    elapsed: float      # seconds
+    tt_hit_rate: float = 0.0
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+
+class SearchAborted(Exception):
+    pass
+
+
+# shared between searches so later moves reuse what earlier ones found
+TRANSPOSITION_TABLE = TranspositionTable()
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    # mate scores are stored relative to the node, not the root
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def evaluate(position: Position) -> int:
+    """Material plus piece-square score from the side to move's point of view."""
+    score = 0
+    pieces = position.pieces
+    for kind in range(6):
+        value, table = PIECE_VALUES[kind], PST[kind]
+        for sq in iter_bits(pieces[kind]):
+            score += value + table[sq]
+        for sq in iter_bits(pieces[6 + kind]):
+            score -= value + table[sq ^ 56]
+    return score if position.side == 0 else -score
+
+
+def _order_key(position: Position, move: Move) -> int:
+    victim = position.squares[move.to_row * 8 + move.to_col]
+    attacker = position.squares[move.from_row * 8 + move.from_col]
+    key = 0
+    if victim >= 0:
+        key = 10 * PIECE_VALUES[victim % 6] - PIECE_VALUES[attacker % 6] + 10000
+    elif move.flag == "en_passant":
+        key = 10000 + 9 * PIECE_VALUES[0]
+    if move.promotion:
+        key += PIECE_VALUES[("pawn", "knight", "bishop", "rook", "queen").index(move.promotion)]
+    return key
+
+
+class Searcher:
+    """Negamax alpha-beta with iterative deepening and quiescence on captures."""
+
+    def __init__(self, limits: SearchLimits, tt: Optional[TranspositionTable] = None,
+                 cancel: Optional[threading.Event] = None):
+        self.limits = limits
+        self.cancel = cancel
+        self.tt = tt if tt is not None else TRANSPOSITION_TABLE
+        self.tablebase = get_tablebase()
+        self.nodes = 0
+        self.started = 0.0
+        self.deadline = None
+
+    def _tick(self) -> None:
+        self.nodes += 1
+        if self.limits.nodes is not None and self.nodes >= self.limits.nodes:
+            raise SearchAborted
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            if self.cancel is not None and self.cancel.is_set():
+                raise SearchAborted
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchAborted
+
+    def _ordered(self, position: Position, moves, first: Optional[Move] = None):
+        moves.sort(key=lambda m: _order_key(position, m), reverse=True)
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def search(self, position: Position) -> SearchResult:
+        self.nodes = 0
+        self.started = time.perf_counter()
+        self.tt.new_search()
+        probes, hits = self.tt.probes, self.tt.hits
+        if self.limits.time_ms is not None:
+            self.deadline = self.started + self.limits.time_ms / 1000
+        root_moves = position.legal_moves()
+        if not root_moves:
+            score = -MATE_SCORE if position.in_check() else 0
+            return SearchResult(None, score, 0, 0, time.perf_counter() - self.started)
+
+        best_move, best_score, depth_done = root_moves[0], 0, 0
+        history_len = len(position.history)
+        for depth in range(1, self.limits.depth + 1):
+            try:
+                score, move = self._root(position, root_moves, depth, best_move)
+            except SearchAborted:
+                # unwind the moves the aborted branch left on the position
+                while len(position.history) > history_len:
+                    position.unmake_move()
+                break
+            best_move, best_score, depth_done = move, score, depth
+            if len(root_moves) == 1 or abs(score) > MATE_BOUND:
+                break
+
+        probes = self.tt.probes - probes
+        hit_rate = (self.tt.hits - hits) / probes if probes else 0.0
+        return SearchResult(best_move, best_score, depth_done, self.nodes,
+                            time.perf_counter() - self.started, hit_rate)
+
+    def _root(self, position: Position, root_moves, depth: int, previous: Move):
+        alpha, beta = -INFINITY, INFINITY
+        best_move = None
+        for move in self._ordered(position, root_moves, previous):
+            position.make_move(move)
+            score = -self._negamax(position, depth - 1, -beta, -alpha, 1)
+            position.unmake_move()
+            if score > alpha:
+                alpha, best_move = score, move
+        self.tt.store(position.key, depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _negamax(self, position: Position, depth: int, alpha: int, beta: int, ply: int) -> int:
+        if position.occupied.bit_count() <= 3:
+            # three men or fewer: the tablebase knows the exact result
+            result = self.tablebase.probe(position)
+            if result is not None:
+                if result.wdl > 0:
+                    return MATE_SCORE - ply - result.plies
+                if result.wdl < 0:
+                    return -MATE_SCORE + ply + result.plies
+                return 0
+        if depth <= 0:
+            return self._quiesce(position, alpha, beta)
+        self._tick()
+
+        tt_move = None
+        entry = self.tt.probe(position.key)
+        if entry is not None:
+            tt_move = entry.move
+            if entry.depth >= depth:
+                score = _score_from_tt(entry.score, ply)
+                if entry.bound == EXACT:
+                    return score
+                if entry.bound == LOWER and score >= beta:
+                    return score
+                if entry.bound == UPPER and score <= alpha:
+                    return score
+
+        alpha_orig = alpha
+        best_score, best_move = -INFINITY, None
+        us = position.side
+        legal = 0
+        for move in self._ordered(position, position.pseudo_moves(), tt_move):
+            position.make_move(move)
+            if position.in_check(us):
+                position.unmake_move()
+                continue
+            legal += 1
+            score = -self._negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmake_move()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score >= beta:
+                break
+            if score > alpha:
+                alpha = score
+
+        if not legal:
+            return -MATE_SCORE + ply if position.in_check() else 0
+
+        if best_score >= beta:
+            bound = LOWER
+        elif best_score <= alpha_orig:
+            bound = UPPER
+        else:
+            bound = EXACT
+        self.tt.store(position.key, depth, _score_to_tt(best_score, ply), bound, best_move)
+        return best_score
+
+    def _quiesce(self, position: Position, alpha: int, beta: int) -> int:
+        self._tick()
+        stand_pat = evaluate(position)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        us = position.side
+        for move in self._ordered(position, position.pseudo_moves(captures_only=True)):
+            position.make_move(move)
+            if position.in_check(us):
+                position.unmake_move()
+                continue
+            score = -self._quiesce(position, -beta, -alpha)
+            position.unmake_move()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+
+def search(position: Position, limits: Optional[SearchLimits] = None,
+           tt: Optional[TranspositionTable] = None, cancel: Optional[threading.Event] = None) -> SearchResult:
+    return Searcher(limits or SearchLimits(), tt, cancel).search(position)
+
+
+def chessMoveAI(board: list[list[Optional[Piece]]], turn, limits: Optional[SearchLimits] = None,
+                state: Optional[dict] = None, use_book: bool = True, verbose: bool = True,
+                cancel: Optional[threading.Event] = None) -> Optional[str]:
+    """
+    Return the move for `turn` as "Piece-e2-e4", or None if there is no
+    legal move.  Book positions are answered from the opening book and
+    tablebase endings from the tablebase without searching; otherwise the
+    position is searched within `limits`, stopping early once `cancel` is
+    set.  `verbose=False` keeps it quiet for batch play.
+    """
+    position = position_from_board(board, state, turn)
+    if use_book:
+        book_move = get_book().choose(position)
+        if book_move is not None:
+            if verbose:
+                print(f"AI book move: {book_move}")
+            return str(book_move)
+    tablebase = get_tablebase()
+    result = tablebase.probe(position)
+    if result is not None:
+        tb_move = tablebase.best_move(position)
+        if tb_move is not None:
+            if verbose:
+                print(f"AI tablebase move: {tb_move} ({turn} {result})")
+            return str(tb_move)
+    result = search(position, limits, cancel=cancel)
+    if verbose:
+        print(f"AI search: depth {result.depth}, {result.nodes} nodes, "
+              f"{result.nps} nps, score {result.score}, tt hits {result.tt_hit_rate:.0%}")
+    return str(result.move) if result.move else None
+
+
+# one search at a time: a second worker would only halve the speed of both
+_engine_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine")
+
+
+class EngineRequest:
+    """
+    chessMoveAI on the engine's own worker thread, so the window keeps
+    drawing and a search never queues behind model calls.  poll() returns
+    None until the move string is ready; cancel() stops the search at its
+    next node check.
+    """
+
+    def __init__(self, board: list[list[Optional[Piece]]], turn, limits: Optional[SearchLimits] = None,
+                 state: Optional[dict] = None, use_book: bool = True):
+        self.cancel_event = threading.Event()
+        self.cancelled = False
+        self.error = None
+        self.answer = None
+        self._done = False
+        snapshot, state = [row[:] for row in board], dict(state) if state is not None else None
+        self._future = _engine_executor.submit(chessMoveAI, snapshot, turn, limits, state, use_book,
+                                               cancel=self.cancel_event)
+
+    def poll(self) -> Optional[str]:
+        if self._done or self.cancelled:
+            return self.answer
+        if self._future.done():
+            try:
+                self.answer = self._future.result()
+            except Exception as e:
+                self.error = e
+            self._done = True
+        return self.answer
 
-def chessMoveAI(board: list[list[Optional[Piece]]], turn) -> str:
+    def done(self) -> bool:
+        self.poll()
+        return self._done or self.cancelled
 
-    return 'rook-e4-e5'
+    def cancel(self) -> None:
+        self.cancelled = True
+        self.cancel_event.set()
+        self._future.cancel()
@@ -0,0 +1,191 @@
+"""
+Attack map for the list-of-lists board.
+
+Squares are numbered ``row * 8 + col`` with row 0 being rank 8, the same
+orientation as ``board[row][col]``.  All movement patterns are precomputed
+once at import time, so building a map is a single pass over the pieces and
+updating it after a move only touches the pieces whose attacks can change.
+"""
+
+ORTHOGONAL = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIAGONAL = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+DIRECTIONS = ORTHOGONAL + DIAGONAL
+
+# which ray directions each slider uses (indexes into DIRECTIONS)
+SLIDER_DIRECTIONS = {
+    "rook": (0, 1, 2, 3),
+    "bishop": (4, 5, 6, 7),
+    "queen": (0, 1, 2, 3, 4, 5, 6, 7),
+}
+
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def _offset_table(offsets):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        table.append(tuple((r + dr) * 8 + c + dc for dr, dc in offsets
+                           if 0 <= r + dr < 8 and 0 <= c + dc < 8))
+    return tuple(table)
+
+
+def _ray_table():
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        rays = []
+        for dr, dc in DIRECTIONS:
+            ray = []
+            nr, nc = r + dr, c + dc
+            while 0 <= nr < 8 and 0 <= nc < 8:
+                ray.append(nr * 8 + nc)
+                nr += dr
+                nc += dc
+            rays.append(tuple(ray))
+        table.append(tuple(rays))
+    return tuple(table)
+
+
+KNIGHT_TARGETS = _offset_table(KNIGHT_OFFSETS)
+KING_TARGETS = _offset_table(KING_OFFSETS)
+PAWN_ATTACKS = {
+    "white": _offset_table(((-1, -1), (-1, 1))),
+    "black": _offset_table(((1, -1), (1, 1))),
+}
+RAYS = _ray_table()
+
+# direction index -> index of the opposite direction
+OPPOSITE = (1, 0, 3, 2, 7, 6, 5, 4)
+
+
+def piece_attacks(board, piece, sq):
+    """Return a tuple of squares attacked by `piece` standing on `sq`."""
+    kind = piece.kind
+    if kind == "knight":
+        return KNIGHT_TARGETS[sq]
+    if kind == "king":
+        return KING_TARGETS[sq]
+    if kind == "pawn":
+        return PAWN_ATTACKS[piece.color][sq]
+
+    targets = []
+    rays = RAYS[sq]
+    for d in SLIDER_DIRECTIONS.get(kind, ()):
+        for t in rays[d]:
+            targets.append(t)
+            if board[t >> 3][t & 7] is not None:
+                break
+    return tuple(targets)
+
+
+def is_square_attacked(board, row, col, by_color):
+    """
+    Return True if any `by_color` piece attacks (row, col).
+    Looks outward from the square instead of enumerating every attacker.
+    """
+    sq = row * 8 + col
+    for t in KNIGHT_TARGETS[sq]:
+        p = board[t >> 3][t & 7]
+        if p is not None and p.color == by_color and p.kind == "knight":
+            return True
+    for t in KING_TARGETS[sq]:
+        p = board[t >> 3][t & 7]
+        if p is not None and p.color == by_color and p.kind == "king":
+            return True
+    # a pawn of `by_color` attacks sq if sq's opposite-colour pawn attacks reach it
+    for t in PAWN_ATTACKS["black" if by_color == "white" else "white"][sq]:
+        p = board[t >> 3][t & 7]
+        if p is not None and p.color == by_color and p.kind == "pawn":
+            return True
+    rays = RAYS[sq]
+    for d in range(8):
+        for t in rays[d]:
+            p = board[t >> 3][t & 7]
+            if p is None:
+                continue
+            if p.color == by_color:
+                if p.kind == "queen" or p.kind == ("rook" if d < 4 else "bishop"):
+                    return True
+            break
+    return False
+
+
+class AttackMap:
+    """
+    Per-colour attack counts for every square of a board.
+
+    Build it once for a position, then call ``update(board, changed)`` after
+    the board has been mutated (move made or undone).  Only the pieces on the
+    changed squares and the sliders whose rays ran into them are recomputed.
+    """
+
+    def __init__(self, board):
+        self.attacks_from = [()] * 64
+        self.owner = [None] * 64      # colour of the piece on each square
+        self.kind = [None] * 64       # kind of the piece on each square
+        self.counts = {"white": [0] * 64, "black": [0] * 64}
+        for sq in range(64):
+            self._add(board, sq)
+
+    def _add(self, board, sq):
+        piece = board[sq >> 3][sq & 7]
+        if piece is None:
+            return
+        targets = piece_attacks(board, piece, sq)
+        self.attacks_from[sq] = targets
+        self.owner[sq] = piece.color
+        self.kind[sq] = piece.kind
+        counts = self.counts[piece.color]
+        for t in targets:
+            counts[t] += 1
+
+    def _remove(self, sq):
+        color = self.owner[sq]
+        if color is None:
+            return
+        counts = self.counts[color]
+        for t in self.attacks_from[sq]:
+            counts[t] -= 1
+        self.attacks_from[sq] = ()
+        self.owner[sq] = None
+        self.kind[sq] = None
+
+    def update(self, board, changed):
+        """
+        Bring the map in line with `board` after the squares in `changed`
+        (iterable of (row, col)) were modified.
+        """
+        affected = set()
+        for row, col in changed:
+            sq = row * 8 + col
+            affected.add(sq)
+            # sliders that saw this square before the change; their rays
+            # either stop here now or run past it
+            rays = RAYS[sq]
+            for d in range(8):
+                for t in rays[d]:
+                    if self.owner[t] is None:
+                        continue
+                    if self.kind[t] in SLIDER_DIRECTIONS and OPPOSITE[d] in SLIDER_DIRECTIONS[self.kind[t]]:
+                        affected.add(t)
+                    break
+        for sq in affected:
+            self._remove(sq)
+        for sq in affected:
+            self._add(board, sq)
+
+    def is_attacked(self, row, col, by_color):
+        return self.counts[by_color][row * 8 + col] > 0
+
+    def attack_board(self, attacker_color):
+        """Return an 8x8 grid of booleans, True where `attacker_color` attacks."""
+        counts = self.counts[attacker_color]
+        return [[counts[r * 8 + c] > 0 for c in range(8)] for r in range(8)]
+
+    def find_king(self, color):
+        for sq in range(64):
+            if self.kind[sq] == "king" and self.owner[sq] == color:
+                return sq >> 3, sq & 7
+        return None
@@ -0,0 +1,163 @@
+"""
+Opening book in the Polyglot .bin layout.
+
+The file is a sorted array of 16-byte big-endian entries
+(key u64, move u16, weight u16, learn u32).  It is memory-mapped and
+binary-searched by key, so a lookup touches a handful of pages and takes
+microseconds.  Moves use the Polyglot encoding: to-square in bits 0-5,
+from-square in bits 6-11 (a1 = 0, h8 = 63), promotion in bits 12-14
+(1 knight .. 4 queen), castling written as the king taking its own rook.
+
+Keys are Polyglot keys (chessPolyglot), kept apart from the search's own
+Zobrist keys, so books built with `python -m makebook` and .bin books
+made by other Polyglot tools both work.
+"""
+import mmap
+import os
+import random
+import struct
+from typing import NamedTuple, Optional
+
+from chessPosition import Position, Move, KINDS, ROOK
+from chessPolyglot import polyglot_key
+
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+POLYGLOT_PROMOTIONS = (None, "knight", "bishop", "rook", "queen")
+
+# default book next to the program; CHESS_BOOK overrides it
+BOOK_PATH = os.environ.get("CHESS_BOOK", os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin"))
+
+
+class BookEntry(NamedTuple):
+    key: int
+    move: int       # Polyglot-encoded
+    weight: int
+    learn: int = 0
+
+
+def _square(row, col):
+    return (7 - row) * 8 + col
+
+
+def encode_move(move: Move) -> int:
+    to_col = move.to_col
+    if move.flag == "castle":
+        to_col = 7 if move.to_col > move.from_col else 0
+    promotion = POLYGLOT_PROMOTIONS.index(move.promotion) if move.promotion else 0
+    return promotion << 12 | _square(move.from_row, move.from_col) << 6 | _square(move.to_row, to_col)
+
+
+def decode_move(position: Position, raw: int) -> Optional[Move]:
+    """Return the legal move of `position` that `raw` stands for, or None."""
+    fr, to, promotion = raw >> 6 & 63, raw & 63, raw >> 12 & 7
+    from_row, from_col, to_row, to_col = 7 - fr // 8, fr % 8, 7 - to // 8, to % 8
+    code = position.squares[from_row * 8 + from_col]
+    if code < 0 or code // 6 != position.side or promotion >= len(POLYGLOT_PROMOTIONS):
+        return None
+    kind = KINDS[code % 6]
+    target = position.squares[to_row * 8 + to_col]
+    flag = None
+    if kind == "king" and target == position.side * 6 + ROOK:
+        flag, to_col = "castle", 6 if to_col > from_col else 2
+    elif target >= 0 and target // 6 == position.side:
+        return None
+    elif kind == "pawn" and abs(to_row - from_row) == 2:
+        flag = "double"
+    elif kind == "pawn" and from_col != to_col and target < 0:
+        flag = "en_passant"
+    move = Move(from_row, from_col, to_row, to_col, kind, POLYGLOT_PROMOTIONS[promotion], flag)
+
+    # a stale or foreign book can hold anything: only trust moves the generator makes too
+    if move not in position.pseudo_moves():
+        return None
+    us = position.side
+    position.make_move(move)
+    legal = not position.in_check(us)
+    position.unmake_move()
+    return move if legal else None
+
+
+class OpeningBook:
+    """Read-only view of a .bin book; a missing or empty file is an empty book."""
+
+    def __init__(self, path: str = BOOK_PATH):
+        self.path = path
+        self._file = None
+        self._map = None
+        self.size = 0
+        if os.path.exists(path) and os.path.getsize(path) >= ENTRY.size:
+            self._file = open(path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.size = len(self._map) // ENTRY.size
+
+    def __len__(self):
+        return self.size
+
+    def _key_at(self, index: int) -> int:
+        return KEY.unpack_from(self._map, index * ENTRY.size)[0]
+
+    def entries(self, key: int) -> list:
+        """Every entry stored for `key`."""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = []
+        while lo < self.size and self._key_at(lo) == key:
+            found.append(BookEntry(*ENTRY.unpack_from(self._map, lo * ENTRY.size)))
+            lo += 1
+        return found
+
+    def moves(self, position: Position) -> list:
+        """(Move, weight) pairs for `position`, illegal or zero-weight entries skipped."""
+        result = []
+        for entry in self.entries(polyglot_key(position)):
+            if entry.weight:
+                move = decode_move(position, entry.move)
+                if move is not None:
+                    result.append((move, entry.weight))
+        return result
+
+    def choose(self, position: Position, rng=random) -> Optional[Move]:
+        """A book move picked at random in proportion to its weight, or None."""
+        moves = self.moves(position)
+        if not moves:
+            return None
+        return rng.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+            self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_book(path: str, entries) -> int:
+    """Write `entries` (BookEntry or tuples) sorted by key, heaviest move first.  Returns the count."""
+    entries = sorted((BookEntry(*entry) for entry in entries), key=lambda e: (e.key, -e.weight, e.move))
+    with open(path, "wb") as f:
+        for entry in entries:
+            f.write(ENTRY.pack(*entry))
+    return len(entries)
+
+
+_book = None
+
+
+def get_book() -> OpeningBook:
+    """The BOOK_PATH book, opened once per process."""
+    global _book
+    if _book is None:
+        _book = OpeningBook(BOOK_PATH)
+    return _book
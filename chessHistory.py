@@ -0,0 +1,133 @@
+"""
+Game history as a reversible log instead of a board snapshot per ply.
+
+Every entry holds what is needed to play it forwards and backwards (the
+Undo record of a move, or the two squares of a swap) plus the game state
+before and after it, so castling rights, the en passant square, the side to
+move and which players have used their swap come back exactly.  A full
+copy of the board is only kept every `checkpoint_interval` entries; seeking
+starts from whichever is nearer, the current entry or a checkpoint, so it
+costs at most half an interval of replayed entries plus the distance from
+where the board already is.
+"""
+from typing import NamedTuple, Optional
+
+from chessMove import Move, Undo, make_move, unmake_move, swap_pieces
+
+
+class HistoryEntry(NamedTuple):
+    kind: str                   # "move" or "swap"
+    move: Optional[Move]
+    squares: tuple              # the two swapped squares, or the squares the move touched
+    undo: Optional[Undo]
+    before: dict                # game state before the entry
+    after: dict                 # game state after the entry
+
+
+class GameHistory:
+    def __init__(self, board, state, checkpoint_interval=16):
+        self.entries = []
+        self.cursor = 0                 # number of entries applied to the board
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints = {0: ([row[:] for row in board], dict(state))}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def at_end(self):
+        return self.cursor == len(self.entries)
+
+    @property
+    def moves_played(self):
+        return sum(1 for entry in self.entries[:self.cursor] if entry.kind == "move")
+
+    def move_log(self):
+        """The moves up to the current entry as "Pawn-e2-e4" strings."""
+        return [str(entry.move) for entry in self.entries[:self.cursor] if entry.kind == "move"]
+
+    def _truncate(self):
+        del self.entries[self.cursor:]
+        for ply in [ply for ply in self.checkpoints if ply > self.cursor]:
+            del self.checkpoints[ply]
+
+    def _append(self, board, entry):
+        self.entries.append(entry)
+        self.cursor += 1
+        if self.cursor % self.checkpoint_interval == 0:
+            self.checkpoints[self.cursor] = ([row[:] for row in board], dict(entry.after))
+
+    def push_move(self, board, state, move, before=None):
+        """
+        Play `move` on `board`, dropping any entries after the current one.
+        `before` is the state to restore when stepping back over it, if the
+        caller has already touched `state` for this move.  Returns the Undo.
+        """
+        self._truncate()
+        before = dict(state if before is None else before)
+        undo = make_move(board, move, state)
+        self._append(board, HistoryEntry("move", move, undo.changed, undo, before, dict(state)))
+        return undo
+
+    def push_swap(self, board, state, first, second):
+        """Swap two pieces of the side to move and mark its swap as used.  Returns the changed squares."""
+        self._truncate()
+        before = dict(state)
+        color = board[first[0]][first[1]].color
+        changed = swap_pieces(board, first, second, state)
+        state["swapsUsed"] = tuple(state.get("swapsUsed", ())) + (color,)
+        self._append(board, HistoryEntry("swap", None, changed, None, before, dict(state)))
+        return changed
+
+    def _step_back(self, board, state):
+        self.cursor -= 1
+        entry = self.entries[self.cursor]
+        if entry.kind == "move":
+            unmake_move(board, entry.undo)
+        else:
+            swap_pieces(board, *entry.squares)
+        state.clear()
+        state.update(entry.before)
+        return entry.squares
+
+    def _step_forward(self, board, state):
+        entry = self.entries[self.cursor]
+        self.cursor += 1
+        if entry.kind == "move":
+            make_move(board, entry.move)
+        else:
+            swap_pieces(board, *entry.squares)
+        state.clear()
+        state.update(entry.after)
+        return entry.squares
+
+    def seek(self, board, state, target):
+        """
+        Bring `board` and `state` (both changed in place) to the position
+        after `target` entries.  Returns the squares whose piece may have
+        changed.
+        """
+        target = max(0, min(target, len(self.entries)))
+        nearest = min(self.checkpoints, key=lambda ply: abs(ply - target))
+        changed = set()
+        if abs(nearest - target) < abs(self.cursor - target):
+            saved_board, saved_state = self.checkpoints[nearest]
+            for row in range(8):
+                for col in range(8):
+                    if board[row][col] is not saved_board[row][col]:
+                        changed.add((row, col))
+                board[row][:] = saved_board[row]
+            state.clear()
+            state.update(saved_state)
+            self.cursor = nearest
+        while self.cursor > target:
+            changed.update(self._step_back(board, state))
+        while self.cursor < target:
+            changed.update(self._step_forward(board, state))
+        return changed
+
+    def back(self, board, state):
+        return self.seek(board, state, self.cursor - 1)
+
+    def forward(self, board, state):
+        return self.seek(board, state, self.cursor + 1)
@@ -1,4 +1,13 @@
 from piece import *
+from typing import NamedTuple, Optional
+import re
+
+from chessAttack import piece_attacks
+from chessPosition import Position, Move
+from chessTransposition import PositionCache
+
+MOVE_RE = re.compile(r"([a-zA-Z]+)-([a-h][1-8])-([a-h][1-8])")
+
 def pos_to_index(pos):
     col = ord(pos[0].lower()) - ord('a')
     row = 8 - int(pos[1])
@@ -17,8 +26,7 @@ def is_clear_path(board, r1, c1, r2, c2):
     return True
 
 def isLegalMove(board, move_str, state=None):
-    import re
-    match = re.match(r"([a-zA-Z]+)-([a-h][1-8])-([a-h][1-8])", move_str)
+    match = MOVE_RE.match(move_str)
     if not match:
         return False
 
@@ -40,11 +48,9 @@ def isLegalMove(board, move_str, state=None):
 
     # Castling logic
     if piece.kind == "king" and abs_dc == 2 and dr == 0:
-        if piece.has_moved:
-            return False
         rook_col = 0 if dc == -2 else 7
-        rook = board[from_row][rook_col]
-        if not rook or rook.kind != "rook" or rook.color != piece.color or rook.has_moved:
+        right = CASTLING_CORNERS.get((from_row, rook_col))
+        if right is None or right not in castling_rights(board, state):
             return False
         return is_clear_path(board, from_row, from_col, from_row, rook_col)
 
@@ -84,7 +90,7 @@ def isLegalMove(board, move_str, state=None):
             if state:
                 last_move = state.get("lastMove")
                 if last_move:
-                    last_piece_type, last_from, last_to = re.match(r"([a-zA-Z]+)-([a-h][1-8])-([a-h][1-8])", last_move).groups()
+                    last_piece_type, last_from, last_to = MOVE_RE.match(last_move).groups()
                     last_from_row, last_from_col = pos_to_index(last_from)
                     last_to_row, last_to_col = pos_to_index(last_to)
                     last_piece = board[last_to_row][last_to_col]
@@ -127,9 +133,7 @@ def getAttackPoses(board, piece_type, position):
     Return a list of positions the given piece type can attack from the given position.
     e.g., getAttackPoses(board, "KING", "e4")
     """
-    poses = []
-    r1 = 8 - int(position[1])
-    c1 = ord(position[0].lower()) - ord('a')
+    r1, c1 = pos_to_index(position)
     piece_type = piece_type.lower()
 
     piece = board[r1][c1]
@@ -139,13 +143,221 @@ def getAttackPoses(board, piece_type, position):
     if piece_type == "pawn":
         return getPawnAttackSquares(board, position)
 
-    for r2 in range(8):
-        for c2 in range(8):
-            if r1 == r2 and c1 == c2:
-                continue
-            move_str = f"{piece_type.capitalize()}-{position}-{chr(c2 + 97)}{8 - r2}"
-            if isLegalMove(board, move_str):
-                poses.append((r2, c2))
-
+    poses = []
+    for sq in piece_attacks(board, piece, r1 * 8 + c1):
+        target = board[sq >> 3][sq & 7]
+        if target is None or target.color != piece.color:
+            poses.append((sq >> 3, sq & 7))
     return poses
 
+
+# --------------------------------------------------------------------
+# Legal move generation
+# --------------------------------------------------------------------
+def opponent(color):
+    return "black" if color == "white" else "white"
+
+
+def en_passant_square(board, state):
+    """Return the (row, col) a pawn may capture en passant on, or None."""
+    if state and "enPassant" in state:
+        return state["enPassant"]
+    if not state or not state.get("lastMove"):
+        return None
+    match = MOVE_RE.match(str(state["lastMove"]))
+    if not match:
+        return None
+    _, last_from, last_to = match.groups()
+    from_row, from_col = pos_to_index(last_from)
+    to_row, to_col = pos_to_index(last_to)
+    last_piece = board[to_row][to_col]
+    if last_piece and last_piece.kind == "pawn" and abs(to_row - from_row) == 2 and from_col == to_col:
+        return (from_row + to_row) // 2, to_col
+    return None
+
+
+CASTLING_CORNERS = {(7, 7): "K", (7, 0): "Q", (0, 7): "k", (0, 0): "q"}
+
+
+def castling_rights(board, state=None):
+    """
+    Return the castling rights as a FEN-style string such as "KQkq".
+    state["castling"] wins when present; otherwise every king and rook still on
+    its home square is assumed not to have moved.
+    """
+    if state and state.get("castling") is not None:
+        return state["castling"]
+    return home_castling_rights(board)
+
+
+def home_castling_rights(board):
+    """Rights for every king and rook of the same colour that stand on their home squares."""
+    rights = ""
+    for (row, col), flag in CASTLING_CORNERS.items():
+        king, rook = board[row][4], board[row][col]
+        if (king and king.kind == "king" and king.color == ("white" if row == 7 else "black") and
+                rook and rook.kind == "rook" and rook.color == king.color):
+            rights += flag
+    return rights
+
+
+def position_from_board(board, state=None, color=None):
+    """Return the bitboard Position for `board` with `color` (default: state["turn"], else white) to move."""
+    if color is None:
+        color = (state or {}).get("turn", "white")
+    return Position.from_board(board, color, castling_rights(board, state), en_passant_square(board, state))
+
+
+def iter_legal_moves(board, state=None, color=None):
+    """Lazily yield the legal moves of `color` (default: state["turn"], else white)."""
+    return position_from_board(board, state, color).iter_legal_moves()
+
+
+def generate_legal_moves(board, state=None, color=None):
+    """
+    Return every legal Move for `color`: castling (state["castling"] or the
+    home squares), en passant (state["enPassant"] or state["lastMove"]),
+    all four promotions, and moves that would leave the
+    own king attacked filtered out.
+    """
+    return list(iter_legal_moves(board, state, color))
+
+
+def has_legal_move(board, state=None, color=None):
+    for _ in iter_legal_moves(board, state, color):
+        return True
+    return False
+
+
+# (in_check, legal moves) per Zobrist key, shared by every status query
+STATUS_CACHE = PositionCache(4096)
+
+
+def position_status(board, state=None, color=None):
+    """
+    Return (in_check, legal_moves) for `color`.  Positions seen before are
+    answered from STATUS_CACHE instead of generating moves again.
+    """
+    position = position_from_board(board, state, color)
+    status = STATUS_CACHE.get(position.key)
+    if status is None:
+        status = (position.in_check(), tuple(position.legal_moves()))
+        STATUS_CACHE.put(position.key, status)
+    return status
+
+
+# --------------------------------------------------------------------
+# Make / unmake
+# --------------------------------------------------------------------
+# state keys that make_move rewrites and unmake_move puts back
+STATE_KEYS = ("lastMove", "enPassant", "castling", "turn")
+
+
+class Undo(NamedTuple):
+    move: Move
+    moved: Piece                       # the piece that left the from-square
+    captured: Optional[Piece]
+    captured_pos: tuple
+    rook_from: Optional[tuple]         # castling only
+    rook_to: Optional[tuple]
+    state: Optional[tuple]             # ((key, was_present, value), ...)
+    changed: tuple                     # squares touched, for AttackMap.update
+
+
+def make_move(board, move, state=None):
+    """
+    Play `move` on `board` in place and return the Undo record that
+    unmake_move needs.  When `state` is given its lastMove, enPassant,
+    castling and turn entries are advanced too.
+    """
+    fr, fc, tr, tc = move.from_row, move.from_col, move.to_row, move.to_col
+    moved = board[fr][fc]
+    captured_pos = (fr, tc) if move.flag == "en_passant" else (tr, tc)
+    captured = board[captured_pos[0]][captured_pos[1]]
+
+    saved = None
+    if state is not None:
+        saved = tuple((key, key in state, state.get(key)) for key in STATE_KEYS)
+        rights = castling_rights(board, state)
+
+    board[captured_pos[0]][captured_pos[1]] = None
+    board[fr][fc] = None
+    board[tr][tc] = Piece(moved.color, move.promotion) if move.promotion else moved
+    changed = [(fr, fc), (tr, tc)]
+    if move.flag == "en_passant":
+        changed.append(captured_pos)
+
+    rook_from = rook_to = None
+    if move.flag == "castle":
+        rook_from = (fr, 7 if tc > fc else 0)
+        rook_to = (fr, (fc + tc) // 2)
+        board[rook_to[0]][rook_to[1]] = board[rook_from[0]][rook_from[1]]
+        board[rook_from[0]][rook_from[1]] = None
+        changed += [rook_from, rook_to]
+
+    if state is not None:
+        if move.kind == "king":
+            rights = rights.replace("K", "").replace("Q", "") if moved.color == "white" \
+                else rights.replace("k", "").replace("q", "")
+        for square in ((fr, fc), (tr, tc)):
+            if square in CASTLING_CORNERS:
+                rights = rights.replace(CASTLING_CORNERS[square], "")
+        state["castling"] = rights
+        state["enPassant"] = ((fr + tr) // 2, fc) if move.flag == "double" else None
+        state["lastMove"] = str(move)
+        if "turn" in state:
+            state["turn"] = opponent(moved.color)
+
+    return Undo(move, moved, captured, captured_pos, rook_from, rook_to, saved, tuple(changed))
+
+
+def unmake_move(board, undo, state=None):
+    """Take back the move recorded in `undo`, restoring board and state exactly."""
+    move = undo.move
+    board[move.to_row][move.to_col] = None
+    board[undo.captured_pos[0]][undo.captured_pos[1]] = undo.captured
+    board[move.from_row][move.from_col] = undo.moved
+
+    if undo.rook_from is not None:
+        board[undo.rook_from[0]][undo.rook_from[1]] = board[undo.rook_to[0]][undo.rook_to[1]]
+        board[undo.rook_to[0]][undo.rook_to[1]] = None
+
+    if state is not None and undo.state is not None:
+        for key, was_present, value in undo.state:
+            if was_present:
+                state[key] = value
+            else:
+                state.pop(key, None)
+
+
+def swap_pieces(board, first, second, state=None):
+    """
+    Swap the pieces on two (row, col) squares in place.  Castling rights of
+    a rook or king that leaves its home square are dropped from
+    state["castling"].  Returns the changed squares.
+    """
+    (r1, c1), (r2, c2) = first, second
+    board[r1][c1], board[r2][c2] = board[r2][c2], board[r1][c1]
+    if state is not None:
+        home_rights = home_castling_rights(board)
+        state["castling"] = "".join(flag for flag in castling_rights(board, state) if flag in home_rights)
+    return (first, second)
+
+
+def find_move(board, move_str, state=None, color=None, promotion="queen"):
+    """
+    Return the legal Move matching a "Piece-e2-e4" string, or None.
+    Pawn moves to the last rank promote to `promotion`.
+    """
+    match = MOVE_RE.match(move_str.strip())
+    if not match:
+        return None
+    piece_type, from_pos, to_pos = match.groups()
+    from_row, from_col = pos_to_index(from_pos)
+    to_row, to_col = pos_to_index(to_pos)
+    for move in iter_legal_moves(board, state, color):
+        if (move.from_row == from_row and move.from_col == from_col and
+                move.to_row == to_row and move.to_col == to_col and
+                move.kind == piece_type.lower() and move.promotion in (None, promotion)):
+            return move
+    return None
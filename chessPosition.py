@@ -0,0 +1,416 @@
+"""
+Bitboard position.
+
+One int per (colour, kind) with bit ``row * 8 + col`` set where such a piece
+stands (row 0 = rank 8, as in ``board[row][col]``), plus per-colour and total
+occupancy masks.  Attack and move generation work on these masks with the
+precomputed tables from chessAttack, so the list-of-lists board only has to
+be walked once, when converting in or out.
+"""
+import random
+from typing import NamedTuple, Optional
+
+from piece import PIECES, COLORS, KINDS
+from chessAttack import DIRECTIONS, KNIGHT_TARGETS, KING_TARGETS, PAWN_ATTACKS, RAYS
+
+COLOR_INDEX = {name: i for i, name in enumerate(COLORS)}
+KIND_INDEX = {name: i for i, name in enumerate(KINDS)}
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+PROMOTION_KINDS = ("queen", "rook", "bishop", "knight")
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+class Move(NamedTuple):
+    from_row: int
+    from_col: int
+    to_row: int
+    to_col: int
+    kind: str                          # kind of the moving piece
+    promotion: Optional[str] = None    # kind the pawn turns into
+    flag: Optional[str] = None         # "castle", "en_passant", "double" or None
+
+    @property
+    def from_pos(self):
+        return f"{chr(self.from_col + 97)}{8 - self.from_row}"
+
+    @property
+    def to_pos(self):
+        return f"{chr(self.to_col + 97)}{8 - self.to_row}"
+
+    def __str__(self):
+        return f"{self.kind.capitalize()}-{self.from_pos}-{self.to_pos}"
+
+
+def _masks(table):
+    return tuple(sum(1 << t for t in targets) for targets in table)
+
+
+KNIGHT_MASKS = _masks(KNIGHT_TARGETS)
+KING_MASKS = _masks(KING_TARGETS)
+PAWN_MASKS = (_masks(PAWN_ATTACKS["white"]), _masks(PAWN_ATTACKS["black"]))
+# RAY_MASKS[d][sq]; directions follow chessAttack.DIRECTIONS
+RAY_MASKS = tuple(tuple(sum(1 << t for t in RAYS[sq][d]) for sq in range(64)) for d in range(8))
+# directions whose square index grows along the ray, so the nearest blocker is the lowest bit
+INCREASING = tuple(dr * 8 + dc > 0 for dr, dc in DIRECTIONS)
+ROOK_DIRS = (0, 1, 2, 3)
+BISHOP_DIRS = (4, 5, 6, 7)
+QUEEN_DIRS = ROOK_DIRS + BISHOP_DIRS
+
+# castling rights as bits; CASTLING_MASK[sq] keeps the rights not lost when sq is touched
+CASTLE_K, CASTLE_Q, CASTLE_k, CASTLE_q = 1, 2, 4, 8
+CASTLING_FLAGS = "KQkq"
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[63] &= ~CASTLE_K
+CASTLING_MASK[56] &= ~CASTLE_Q
+CASTLING_MASK[60] &= ~(CASTLE_K | CASTLE_Q)
+CASTLING_MASK[7] &= ~CASTLE_k
+CASTLING_MASK[0] &= ~CASTLE_q
+CASTLING_MASK[4] &= ~(CASTLE_k | CASTLE_q)
+# (right, king square, rook square, squares that must be empty, square the king crosses)
+CASTLING_MOVES = (
+    (CASTLE_K, 60, 63, (1 << 61) | (1 << 62), 61),
+    (CASTLE_Q, 60, 56, (1 << 57) | (1 << 58) | (1 << 59), 59),
+    (CASTLE_k, 4, 7, (1 << 5) | (1 << 6), 5),
+    (CASTLE_q, 4, 0, (1 << 1) | (1 << 2) | (1 << 3), 3),
+)
+
+
+# Zobrist keys; a fixed seed keeps keys stable between runs so they can be stored
+_zobrist_rng = random.Random(0x5EED2025)
+ZOBRIST_PIECES = tuple(tuple(_zobrist_rng.getrandbits(64) for _ in range(64)) for _ in range(12))
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+ZOBRIST_CASTLING = tuple(_zobrist_rng.getrandbits(64) for _ in range(16))
+ZOBRIST_EP = tuple(_zobrist_rng.getrandbits(64) for _ in range(8))   # by file
+
+
+def slider_attacks(sq, occupied, directions):
+    attacks = 0
+    for d in directions:
+        ray = RAY_MASKS[d][sq]
+        blockers = ray & occupied
+        if blockers:
+            if INCREASING[d]:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= RAY_MASKS[d][first]
+        attacks |= ray
+    return attacks
+
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Position:
+    def __init__(self):
+        self.pieces = [0] * 12          # index color * 6 + kind
+        self.occ = [0, 0]
+        self.occupied = 0
+        self.squares = [-1] * 64        # piece code per square, -1 if empty
+        self.side = 0                   # 0 white, 1 black to move
+        self.castling = 0
+        self.ep = -1                    # en-passant target square or -1
+        self.key = ZOBRIST_CASTLING[0]  # Zobrist key, kept up to date by make/unmake
+        self.history = []
+
+    # ----------------------------------------------------------------
+    # Conversion
+    # ----------------------------------------------------------------
+    @classmethod
+    def from_board(cls, board, color="white", castling="", en_passant=None):
+        """
+        Build a position from the list-of-lists board.  `castling` is a
+        FEN-style rights string and `en_passant` a (row, col) or None.
+        """
+        pos = cls()
+        for row in range(8):
+            for col in range(8):
+                piece = board[row][col]
+                if piece is not None:
+                    pos._put(row * 8 + col, piece.code)
+        pos.side = COLOR_INDEX[color]
+        pos.castling = sum(1 << i for i, flag in enumerate(CASTLING_FLAGS) if flag in (castling or ""))
+        pos.ep = en_passant[0] * 8 + en_passant[1] if en_passant else -1
+        pos._rehash_state()
+        return pos
+
+    @classmethod
+    def from_fen(cls, fen):
+        fields = fen.split()
+        pos = cls()
+        for row, rank in enumerate(fields[0].split("/")):
+            col = 0
+            for ch in rank:
+                if ch.isdigit():
+                    col += int(ch)
+                    continue
+                color = 0 if ch.isupper() else 1
+                pos._put(row * 8 + col, color * 6 + "pnbrqk".index(ch.lower()))
+                col += 1
+        pos.side = 0 if len(fields) < 2 or fields[1] == "w" else 1
+        rights = fields[2] if len(fields) > 2 else "-"
+        pos.castling = sum(1 << i for i, flag in enumerate(CASTLING_FLAGS) if flag in rights)
+        ep = fields[3] if len(fields) > 3 else "-"
+        pos.ep = (8 - int(ep[1])) * 8 + ord(ep[0]) - 97 if ep != "-" else -1
+        pos._rehash_state()
+        return pos
+
+    def _rehash_state(self):
+        """Fold side, castling and en passant into the piece-only key built by _put."""
+        self.key ^= ZOBRIST_CASTLING[0] ^ ZOBRIST_CASTLING[self.castling]
+        if self.ep >= 0:
+            self.key ^= ZOBRIST_EP[self.ep & 7]
+        if self.side:
+            self.key ^= ZOBRIST_SIDE
+
+    def fen(self):
+        ranks = []
+        for row in range(8):
+            rank, empty = "", 0
+            for col in range(8):
+                code = self.squares[row * 8 + col]
+                if code < 0:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                ch = "pnbrqk"[code % 6]
+                rank += ch.upper() if code < 6 else ch
+            ranks.append(rank + (str(empty) if empty else ""))
+        rights = "".join(flag for i, flag in enumerate(CASTLING_FLAGS) if self.castling >> i & 1) or "-"
+        ep = f"{chr(self.ep % 8 + 97)}{8 - self.ep // 8}" if self.ep >= 0 else "-"
+        return f"{'/'.join(ranks)} {'wb'[self.side]} {rights} {ep} 0 1"
+
+    def to_board(self):
+        """
+        Return a fresh list-of-lists board of the shared Piece instances.
+        Castling rights and the en passant square are not part of the board;
+        take them from castling_rights() and en_passant().
+        """
+        board = [[None] * 8 for _ in range(8)]
+        for sq in iter_bits(self.occupied):
+            board[sq >> 3][sq & 7] = PIECES[self.squares[sq]]
+        return board
+
+    def castling_rights(self):
+        return "".join(flag for i, flag in enumerate(CASTLING_FLAGS) if self.castling >> i & 1)
+
+    def en_passant(self):
+        return (self.ep >> 3, self.ep & 7) if self.ep >= 0 else None
+
+    def color_to_move(self):
+        return COLORS[self.side]
+
+    def piece_at(self, row, col):
+        """Return (color, kind) for the square or None."""
+        code = self.squares[row * 8 + col]
+        return (COLORS[code // 6], KINDS[code % 6]) if code >= 0 else None
+
+    # ----------------------------------------------------------------
+    # Attacks
+    # ----------------------------------------------------------------
+    def _put(self, sq, code):
+        bit = 1 << sq
+        self.pieces[code] |= bit
+        self.occ[code // 6] |= bit
+        self.occupied |= bit
+        self.squares[sq] = code
+        self.key ^= ZOBRIST_PIECES[code][sq]
+
+    def _remove(self, sq, code):
+        bit = 1 << sq
+        self.pieces[code] ^= bit
+        self.occ[code // 6] ^= bit
+        self.occupied ^= bit
+        self.squares[sq] = -1
+        self.key ^= ZOBRIST_PIECES[code][sq]
+
+    def is_attacked(self, sq, by):
+        """True if colour index `by` attacks square index `sq`."""
+        p = self.pieces
+        base = by * 6
+        if KNIGHT_MASKS[sq] & p[base + KNIGHT]:
+            return True
+        if KING_MASKS[sq] & p[base + KING]:
+            return True
+        if PAWN_MASKS[1 - by][sq] & p[base + PAWN]:
+            return True
+        queens = p[base + QUEEN]
+        rooks = p[base + ROOK] | queens
+        if rooks and slider_attacks(sq, self.occupied, ROOK_DIRS) & rooks:
+            return True
+        bishops = p[base + BISHOP] | queens
+        if bishops and slider_attacks(sq, self.occupied, BISHOP_DIRS) & bishops:
+            return True
+        return False
+
+    def attacks_from(self, sq):
+        code = self.squares[sq]
+        kind = code % 6
+        if kind == PAWN:
+            return PAWN_MASKS[code // 6][sq]
+        if kind == KNIGHT:
+            return KNIGHT_MASKS[sq]
+        if kind == KING:
+            return KING_MASKS[sq]
+        if kind == ROOK:
+            return slider_attacks(sq, self.occupied, ROOK_DIRS)
+        if kind == BISHOP:
+            return slider_attacks(sq, self.occupied, BISHOP_DIRS)
+        return slider_attacks(sq, self.occupied, QUEEN_DIRS)
+
+    def attack_mask(self, color):
+        """Bitmask of every square attacked by `color` (name or index)."""
+        by = COLOR_INDEX.get(color, color)
+        mask = 0
+        for sq in iter_bits(self.occ[by]):
+            mask |= self.attacks_from(sq)
+        return mask
+
+    def king_square(self, side):
+        king = self.pieces[side * 6 + KING]
+        return king.bit_length() - 1 if king else -1
+
+    def in_check(self, color=None):
+        side = self.side if color is None else COLOR_INDEX.get(color, color)
+        king = self.king_square(side)
+        return king >= 0 and self.is_attacked(king, 1 - side)
+
+    # ----------------------------------------------------------------
+    # Move generation
+    # ----------------------------------------------------------------
+    def pseudo_moves(self, captures_only=False):
+        """
+        Moves that follow the movement rules but may leave the own king in
+        check.  With `captures_only`, just captures and promotions.
+        """
+        us, them = self.side, 1 - self.side
+        base = us * 6
+        own, enemy, occupied = self.occ[us], self.occ[them], self.occupied
+        p = self.pieces
+        moves = []
+        append = moves.append
+
+        # pawns
+        forward = -8 if us == 0 else 8
+        start_row, last_row = (6, 0) if us == 0 else (1, 7)
+        ep_bit = 1 << self.ep if self.ep >= 0 else 0
+        for sq in iter_bits(p[base + PAWN]):
+            r, c = sq >> 3, sq & 7
+            one = sq + forward
+            targets = []
+            if not occupied >> one & 1 and (not captures_only or one >> 3 == last_row):
+                targets.append((one, None))
+                two = one + forward
+                if r == start_row and not captures_only and not occupied >> two & 1:
+                    append(Move(r, c, two >> 3, two & 7, "pawn", None, "double"))
+            attacks = PAWN_MASKS[us][sq]
+            for t in iter_bits(attacks & enemy):
+                targets.append((t, None))
+            if attacks & ep_bit:
+                targets.append((self.ep, "en_passant"))
+            for t, flag in targets:
+                if t >> 3 == last_row:
+                    for promo in PROMOTION_KINDS:
+                        append(Move(r, c, t >> 3, t & 7, "pawn", promo))
+                else:
+                    append(Move(r, c, t >> 3, t & 7, "pawn", None, flag))
+
+        for kind, name in ((KNIGHT, "knight"), (BISHOP, "bishop"), (ROOK, "rook"), (QUEEN, "queen"), (KING, "king")):
+            for sq in iter_bits(p[base + kind]):
+                r, c = sq >> 3, sq & 7
+                if kind == KNIGHT:
+                    targets = KNIGHT_MASKS[sq]
+                elif kind == KING:
+                    targets = KING_MASKS[sq]
+                elif kind == BISHOP:
+                    targets = slider_attacks(sq, occupied, BISHOP_DIRS)
+                elif kind == ROOK:
+                    targets = slider_attacks(sq, occupied, ROOK_DIRS)
+                else:
+                    targets = slider_attacks(sq, occupied, QUEEN_DIRS)
+                for t in iter_bits(targets & (enemy if captures_only else ~own)):
+                    append(Move(r, c, t >> 3, t & 7, name))
+
+        if self.castling and not captures_only:
+            king, rook = base + KING, base + ROOK
+            for right, king_sq, rook_sq, between, crossed in CASTLING_MOVES:
+                if (not self.castling & right or self.squares[king_sq] != king or
+                        self.squares[rook_sq] != rook or occupied & between):
+                    continue
+                if self.is_attacked(king_sq, them) or self.is_attacked(crossed, them):
+                    continue
+                to = king_sq + 2 if rook_sq > king_sq else king_sq - 2
+                append(Move(king_sq >> 3, king_sq & 7, to >> 3, to & 7, "king", None, "castle"))
+        return moves
+
+    def iter_legal_moves(self):
+        us = self.side
+        for move in self.pseudo_moves():
+            self.make_move(move)
+            king = self.king_square(us)
+            legal = king < 0 or not self.is_attacked(king, 1 - us)
+            self.unmake_move()
+            if legal:
+                yield move
+
+    def legal_moves(self):
+        return list(self.iter_legal_moves())
+
+    # ----------------------------------------------------------------
+    # Make / unmake
+    # ----------------------------------------------------------------
+    def make_move(self, move):
+        fr = move.from_row * 8 + move.from_col
+        to = move.to_row * 8 + move.to_col
+        code = self.squares[fr]
+        cap_sq = move.from_row * 8 + move.to_col if move.flag == "en_passant" else to
+        captured = self.squares[cap_sq]
+        self.history.append((move, captured, self.castling, self.ep, self.key))
+
+        if captured >= 0:
+            self._remove(cap_sq, captured)
+        self._remove(fr, code)
+        self._put(to, code - code % 6 + KIND_INDEX[move.promotion] if move.promotion else code)
+        if move.flag == "castle":
+            rook_from, rook_to = (fr + 3, fr + 1) if to > fr else (fr - 4, fr - 1)
+            rook = self.squares[rook_from]
+            self._remove(rook_from, rook)
+            self._put(rook_to, rook)
+
+        key = self.key ^ ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_SIDE
+        if self.ep >= 0:
+            key ^= ZOBRIST_EP[self.ep & 7]
+        self.castling &= CASTLING_MASK[fr] & CASTLING_MASK[to]
+        self.ep = (fr + to) // 2 if move.flag == "double" else -1
+        if self.ep >= 0:
+            key ^= ZOBRIST_EP[self.ep & 7]
+        self.key = key ^ ZOBRIST_CASTLING[self.castling]
+        self.side ^= 1
+
+    def unmake_move(self):
+        move, captured, castling, ep, key = self.history.pop()
+        fr = move.from_row * 8 + move.from_col
+        to = move.to_row * 8 + move.to_col
+        self.side ^= 1
+        self.castling = castling
+        self.ep = ep
+
+        moved = self.squares[to]
+        self._remove(to, moved)
+        self._put(fr, self.side * 6 + PAWN if move.promotion else moved)
+        if captured >= 0:
+            self._put(move.from_row * 8 + move.to_col if move.flag == "en_passant" else to, captured)
+        if move.flag == "castle":
+            rook_from, rook_to = (fr + 3, fr + 1) if to > fr else (fr - 4, fr - 1)
+            rook = self.squares[rook_to]
+            self._remove(rook_to, rook)
+            self._put(rook_from, rook)
+        self.key = key
@@ -0,0 +1,114 @@
+"""
+Incremental drawing for the board window.
+
+The checkered board is drawn once into its own surface.  Every frame the
+renderer compares what each square should show (piece, danger highlight,
+whether its piece is being dragged) with what it last drew there and
+repaints only the squares that differ, plus the squares the dragged piece
+covered last frame and covers now.  The side panel is repainted only when
+its contents change.  flush() hands just those rectangles to
+pygame.display.update, so an idle board costs next to nothing per frame.
+"""
+from typing import Optional
+
+import pygame
+
+PANEL_BACKGROUND = (0, 0, 0)
+
+
+class BoardRenderer:
+    def __init__(self, screen, square_size, light, dark, danger, panel_rect):
+        self.screen = screen
+        self.square_size = square_size
+        self.danger = danger
+        self.board_rect = pygame.Rect(0, 0, square_size * 8, square_size * 8)
+        self.panel_rect = pygame.Rect(panel_rect)
+        self.background = pygame.Surface(self.board_rect.size)
+        for row in range(8):
+            for col in range(8):
+                color = light if (row + col) % 2 == 0 else dark
+                self.background.fill(color, self._square_rect(row, col))
+        self.dirty = []
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Forget what is on screen, e.g. after the window was exposed or resized."""
+        self.drawn = [None] * 64
+        self.drag_rect = None
+        self.panel_key = None
+        self.full = True
+
+    def _square_rect(self, row, col):
+        return pygame.Rect(col * self.square_size, row * self.square_size, self.square_size, self.square_size)
+
+    def draw_board(self, board, piece_images, danger_board=None,
+                   dragging_piece: Optional[tuple] = None, dragging_pos: Optional[tuple] = None) -> None:
+        """Repaint the squares that changed since the last call and the dragged piece."""
+        drag_image = None
+        if dragging_piece and dragging_pos:
+            piece = board[dragging_piece[0]][dragging_piece[1]]
+            if piece:
+                drag_image = piece_images.get(f"{piece.color}-{piece.kind}")
+        drag_rect = drag_image.get_rect(center=dragging_pos) if drag_image else None
+
+        # squares under the dragged piece, before and after, are always repainted
+        stale = set()
+        for rect in (self.drag_rect, drag_rect):
+            if rect is not None:
+                rect = rect.clip(self.board_rect)
+                for row in range(rect.top // self.square_size, (rect.bottom - 1) // self.square_size + 1):
+                    for col in range(rect.left // self.square_size, (rect.right - 1) // self.square_size + 1):
+                        stale.add(row * 8 + col)
+
+        for row in range(8):
+            for col in range(8):
+                sq = row * 8 + col
+                piece = board[row][col]
+                wanted = (None if dragging_piece == (row, col) else piece,
+                          bool(danger_board and danger_board[row][col]))
+                if wanted == self.drawn[sq] and sq not in stale:
+                    continue
+                rect = self._square_rect(row, col)
+                if wanted[1]:
+                    self.screen.fill(self.danger, rect)
+                else:
+                    self.screen.blit(self.background, rect, rect)
+                if wanted[0] is not None:
+                    image = piece_images.get(f"{wanted[0].color}-{wanted[0].kind}")
+                    if image:
+                        self.screen.blit(image, rect)
+                self.drawn[sq] = wanted
+                self.dirty.append(rect)
+
+        if drag_rect is not None:
+            # keep the dragged piece off the panel, which is not repainted every frame
+            self.screen.set_clip(self.board_rect)
+            self.screen.blit(drag_image, drag_rect)
+            self.screen.set_clip(None)
+            self.dirty.append(drag_rect.clip(self.board_rect))
+        self.drag_rect = drag_rect
+
+    def draw_panel(self, key, paint) -> None:
+        """
+        Repaint the panel with `paint(screen)` if `key` (everything the panel
+        shows) differs from the last frame.  Painting is clipped to the panel.
+        """
+        if key == self.panel_key and not self.full:
+            return
+        self.panel_key = key
+        self.screen.set_clip(self.panel_rect)
+        self.screen.fill(PANEL_BACKGROUND, self.panel_rect)
+        paint(self.screen)
+        self.screen.set_clip(None)
+        self.dirty.append(self.panel_rect)
+
+    def flush(self) -> int:
+        """Push the repainted rectangles to the display; returns how many there were."""
+        count = len(self.dirty)
+        if self.full:
+            pygame.display.flip()
+            self.full = False
+        elif self.dirty:
+            pygame.display.update(self.dirty)
+        self.dirty = []
+        return count
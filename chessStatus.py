@@ -0,0 +1,58 @@
+from typing import Optional
+
+from chessMove import Move, position_status, position_from_board
+from chessTablebase import get_tablebase, is_dead_draw
+
+
+class GameStatus:
+    """
+    Check, checkmate, stalemate, dead draws and the legal moves of the side
+    to move, worked out once per position, plus the exact tablebase result
+    when a tablebase covers it.  Call invalidate() whenever the board
+    changes (move, undo/redo, swap, restart); refresh() is free until then.
+    """
+
+    def __init__(self):
+        self.color = None
+        self.in_check = False
+        self.checkmate = False
+        self.stalemate = False
+        self.dead_draw = False
+        self.tablebase = None
+        self.legal_moves = ()
+        self._dirty = True
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def refresh(self, board, state, color) -> bool:
+        """Recompute if needed; return True when the cached answers changed."""
+        if not self._dirty and color == self.color:
+            return False
+        self.color = color
+        self.in_check, self.legal_moves = position_status(board, state, color)
+        self.checkmate = self.in_check and not self.legal_moves
+        self.stalemate = not self.in_check and not self.legal_moves
+        position = position_from_board(board, state, color)
+        self.dead_draw = is_dead_draw(position)
+        self.tablebase = get_tablebase().probe(position)
+        self._dirty = False
+        return True
+
+    @property
+    def tablebase_draw(self) -> bool:
+        """A tablebase says neither side can force mate."""
+        return self.tablebase is not None and self.tablebase.wdl == 0
+
+    @property
+    def game_over(self) -> bool:
+        return not self.legal_moves or self.dead_draw or self.tablebase_draw
+
+    def find_move(self, from_row, from_col, to_row, to_col, promotion="queen") -> Optional[Move]:
+        """Return the legal move between the two squares, or None."""
+        for move in self.legal_moves:
+            if (move.from_row == from_row and move.from_col == from_col and
+                    move.to_row == to_row and move.to_col == to_col and
+                    move.promotion in (None, promotion)):
+                return move
+        return None
@@ -0,0 +1,167 @@
+"""
+Endgame tablebases for king and one piece against a lone king.
+
+Each table (KQK.tb, KRK.tb, KPK.tb, built by `python -m maketablebase`)
+holds one byte per position, indexed by side to move, the strong side's
+king and piece squares and the lone king's square, always with white as
+the strong side; positions with black as the strong side are mirrored
+before probing.  The files are memory-mapped, so probing is a dictionary
+lookup and an index computation.
+
+Byte values: 0 draw, 1..127 the side to move mates in that many plies,
+128 + n the side to move is mated in n plies, 255 an impossible position.
+King against king, or against a lone bishop or knight, is a dead draw and
+needs no table.
+"""
+import mmap
+import os
+from typing import NamedTuple, Optional
+
+from chessPosition import Position, Move, iter_bits, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+
+DRAW, LOSS, ILLEGAL = 0, 128, 255
+TABLE_SIZE = 2 * 64 * 64 * 64
+TABLES = {QUEEN: "KQK", ROOK: "KRK", PAWN: "KPK"}
+
+# generated tables live here; CHESS_TABLEBASES overrides it
+TABLEBASE_DIR = os.environ.get("CHESS_TABLEBASES",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebases"))
+
+
+class TablebaseResult(NamedTuple):
+    wdl: int        # 1 win, 0 draw, -1 loss for the side to move
+    plies: int      # plies to mate when wdl != 0
+
+    def __str__(self):
+        if self.wdl > 0:
+            return f"mates in {(self.plies + 1) // 2}"
+        if self.wdl < 0:
+            return f"is mated in {self.plies // 2}"
+        return "draw"
+
+
+DEAD_DRAW = TablebaseResult(0, 0)
+
+
+def table_index(stm: int, strong_king: int, piece: int, weak_king: int) -> int:
+    return stm << 18 | strong_king << 12 | piece << 6 | weak_king
+
+
+def decode(value: int) -> Optional[TablebaseResult]:
+    if value == ILLEGAL:
+        return None
+    if value == DRAW:
+        return DEAD_DRAW
+    if value < LOSS:
+        return TablebaseResult(1, value)
+    return TablebaseResult(-1, value - LOSS)
+
+
+def is_dead_draw(position: Position) -> bool:
+    """Only the kings are left, plus at most one bishop or knight."""
+    count = position.occupied.bit_count()
+    if count == 2:
+        return True
+    if count == 3:
+        for sq in iter_bits(position.occupied):
+            if position.squares[sq] % 6 in (BISHOP, KNIGHT):
+                return True
+    return False
+
+
+class Tablebase:
+    def __init__(self, directory: str = TABLEBASE_DIR):
+        self.directory = directory
+        self._maps = {}
+        self.probes = 0
+        self.hits = 0
+
+    def _table(self, name: str):
+        if name not in self._maps:
+            path = os.path.join(self.directory, f"{name}.tb")
+            table = None
+            if os.path.exists(path) and os.path.getsize(path) == TABLE_SIZE:
+                with open(path, "rb") as f:
+                    table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[name] = table
+        return self._maps[name]
+
+    def available(self) -> list:
+        return [name for name in TABLES.values() if self._table(name) is not None]
+
+    def probe(self, position: Position) -> Optional[TablebaseResult]:
+        """The exact result for the side to move, or None if no table covers the position."""
+        count = position.occupied.bit_count()
+        if count > 3:
+            return None
+        if is_dead_draw(position):
+            return DEAD_DRAW
+        if position.castling:
+            return None
+        self.probes += 1
+        kings, piece = [], None
+        for sq in iter_bits(position.occupied):
+            code = position.squares[sq]
+            if code % 6 == KING:
+                kings.append((code // 6, sq))
+            else:
+                piece = (code, sq)
+        name = TABLES.get(piece[0] % 6)
+        table = self._table(name) if name else None
+        if table is None:
+            return None
+
+        strong = piece[0] // 6
+        strong_king = next(sq for color, sq in kings if color == strong)
+        weak_king = next(sq for color, sq in kings if color != strong)
+        piece_sq = piece[1]
+        stm = 0 if position.side == strong else 1
+        if strong == 1:
+            # black is the strong side: flip the board so it plays up like white
+            strong_king, piece_sq, weak_king = strong_king ^ 56, piece_sq ^ 56, weak_king ^ 56
+        result = decode(table[table_index(stm, strong_king, piece_sq, weak_king)])
+        if result is not None:
+            self.hits += 1
+        return result
+
+    def best_move(self, position: Position) -> Optional[Move]:
+        """
+        The quickest win, a drawing move, or the longest defence, or None if
+        the position is not in a table.
+        """
+        if self.probe(position) is None:
+            return None
+        best, best_score = None, None
+        for move in position.legal_moves():
+            position.make_move(move)
+            child = self.probe(position)
+            position.unmake_move()
+            if child is None:
+                continue
+            # child is from the opponent's side; prefer fast wins, then draws, then slow losses
+            if child.wdl < 0:
+                score = 1000 - child.plies
+            elif child.wdl > 0:
+                score = -1000 + child.plies
+            else:
+                score = 0
+            if best_score is None or score > best_score:
+                best, best_score = move, score
+        return best
+
+    def close(self) -> None:
+        for table in self._maps.values():
+            if table is not None:
+                table.close()
+        self._maps.clear()
+
+
+_tablebase = None
+
+
+def get_tablebase() -> Tablebase:
+    """The TABLEBASE_DIR tables, opened once per process."""
+    global _tablebase
+    if _tablebase is None:
+        _tablebase = Tablebase(TABLEBASE_DIR)
+    return _tablebase
@@ -0,0 +1,119 @@
+"""
+Position-keyed tables built on the Zobrist keys of chessPosition.Position.
+
+TranspositionTable is the fixed-size search table; PositionCache is a small
+LRU map for anything else that can be reused per position (game status,
+legal-move lists, ...).
+"""
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from chessPosition import Move
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TTEntry(NamedTuple):
+    key: int
+    depth: int
+    score: int
+    bound: int          # EXACT, LOWER (failed high) or UPPER (failed low)
+    move: Optional[Move]
+    generation: int
+
+
+class TranspositionTable:
+    """
+    Fixed number of slots, indexed by the low bits of the key.  A slot is
+    replaced when it is empty, holds the same position, comes from an older
+    search, or was searched no deeper than the new entry.
+    """
+
+    def __init__(self, size: int = 1 << 16):
+        if size & (size - 1):
+            raise ValueError("size must be a power of two")
+        self.entries = [None] * size
+        self.mask = size - 1
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def new_search(self) -> None:
+        self.generation += 1
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        self.probes += 1
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int, move: Optional[Move]) -> None:
+        index = key & self.mask
+        old = self.entries[index]
+        if old is not None and old.key != key:
+            if old.generation == self.generation and old.depth > depth:
+                return
+            self.replacements += 1
+        if old is not None and old.key == key and move is None:
+            move = old.move
+        self.entries[index] = TTEntry(key, depth, score, bound, move, self.generation)
+        self.stores += 1
+
+    def clear(self) -> None:
+        self.entries = [None] * len(self.entries)
+        self.generation = 0
+        self.probes = self.hits = self.stores = self.replacements = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def stats(self) -> dict:
+        used = sum(1 for entry in self.entries if entry is not None)
+        return {
+            "size": len(self.entries),
+            "used": used,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+            "stores": self.stores,
+            "replacements": self.replacements,
+        }
+
+
+class PositionCache:
+    """Key -> value map holding at most `capacity` items, least recently used evicted first."""
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def clear(self) -> None:
+        self.items.clear()
+        self.hits = self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -1,2 +1,4 @@
+from .text import get_font, render_text
+from .sprites import SpriteAtlas, get_piece_atlas
 from .button import Button
 from .card import Card
@@ -1,8 +1,8 @@
 from __future__ import annotations
-import os
 import pygame as pg
 from typing import Callable, Tuple
 
+from .text import get_font, render_text
 from utils.colors import WHITE, BLACK, RED, GREEN, BLUE
 
 
@@ -27,24 +27,15 @@ class Button:
         self.text_color = text_color
         self.border_radius = border_radius
 
-        self.font = self._load_font(font, font_size)
+        self.font_name = font
+        self.font_size = font_size
+        self.font = get_font(font, font_size)
         self._render_text()
 
-    @staticmethod
-    def _load_font(font: str | os.PathLike | None, size: int) -> pg.font.Font:
-        if font is None:
-            return pg.font.Font(None, size)
-
-        font = os.fspath(font)
-        if os.path.isfile(font):
-            return pg.font.Font(font, size)
-
-        return pg.font.SysFont(font, size)
-
     def _render_text(self) -> None:
         if self.text:
-            self._text_surf = self.font.render(
-                self.text, True, self.text_color)
+            self._text_surf = render_text(
+                self.font_name, self.font_size, self.text, self.text_color)
             self._text_rect = self._text_surf.get_rect(center=self.rect.center)
         else:
             self._text_surf = None
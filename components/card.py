@@ -12,6 +12,8 @@ class Card(Button):
         pos: Tuple[int, int],
         size: Tuple[int, int],
         *,
+        font: str | None = './assets/PretendardVariable.ttf',
+        font_size: int = 24,
         bg_color: Tuple[int, int, int] = WHITE,
         text_color: Tuple[int, int, int] = BLACK,
         border_radius: int = 16,
@@ -22,6 +24,8 @@ class Card(Button):
             text=text,
             pos=pos,
             size=size,
+            font=font,
+            font_size=font_size,
             bg_color=bg_color,
             text_color=text_color,
             border_radius=border_radius,
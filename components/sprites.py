@@ -0,0 +1,75 @@
+from __future__ import annotations
+import os
+from typing import Dict, Iterable, Optional
+
+import pygame as pg
+
+PIECE_NAMES = tuple(
+    f"{color}-{kind}"
+    for color in ("white", "black")
+    for kind in ("king", "queen", "rook", "bishop", "knight", "pawn")
+)
+
+
+class SpriteAtlas:
+    """
+    Sprites packed side by side in one surface, each a subsurface of it.
+
+    The source images are read once.  Every size asked for gets its own
+    atlas of smoothscaled sprites, built on first use and kept, so the same
+    images serve any square size (a resized or high-DPI board) without
+    reloading.  Once a display mode is set the atlases are converted to the
+    display's pixel format, so blits need no per-pixel conversion.
+    """
+
+    def __init__(self, directory: str | os.PathLike, names: Iterable[str] = PIECE_NAMES) -> None:
+        self.directory = os.fspath(directory)
+        self.names = tuple(names)
+        self._sources: Dict[str, pg.Surface] = {}
+        for name in self.names:
+            path = os.path.join(self.directory, f"{name}.png")
+            try:
+                self._sources[name] = pg.image.load(path)
+            except (pg.error, FileNotFoundError):
+                print(f"Could not load image: {path}")
+        self._sized: Dict[int, Dict[str, pg.Surface]] = {}
+        self._unconverted: set[int] = set()     # sizes built before a display existed
+
+    def images(self, size: int) -> Dict[str, pg.Surface]:
+        """name -> sprite scaled to `size` x `size`."""
+        sprites = self._sized.get(size)
+        if sprites is None or (size in self._unconverted and pg.display.get_surface() is not None):
+            sprites = self._sized[size] = self._build(size)
+        return sprites
+
+    def get(self, name: str, size: int) -> Optional[pg.Surface]:
+        return self.images(size).get(name)
+
+    def _build(self, size: int) -> Dict[str, pg.Surface]:
+        names = [name for name in self.names if name in self._sources]
+        sheet = pg.Surface((max(1, len(names)) * size, size), pg.SRCALPHA)
+        for index, name in enumerate(names):
+            sheet.blit(pg.transform.smoothscale(self._sources[name], (size, size)), (index * size, 0))
+        if pg.display.get_surface() is not None:
+            sheet = sheet.convert_alpha()
+            self._unconverted.discard(size)
+        else:
+            self._unconverted.add(size)
+        return {name: sheet.subsurface((index * size, 0, size, size)) for index, name in enumerate(names)}
+
+    def clear(self) -> None:
+        """Drop the scaled atlases, e.g. after the display mode changed."""
+        self._sized.clear()
+        self._unconverted.clear()
+
+
+_atlases: Dict[str, SpriteAtlas] = {}
+
+
+def get_piece_atlas(directory: str | os.PathLike) -> SpriteAtlas:
+    """The piece atlas for `directory`, loaded once per process."""
+    key = os.path.abspath(directory)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = SpriteAtlas(directory)
+    return atlas
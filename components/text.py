@@ -0,0 +1,58 @@
+from __future__ import annotations
+import os
+from collections import OrderedDict
+from typing import Tuple
+
+import pygame as pg
+
+TEXT_CACHE_SIZE = 512       # rendered labels kept; clocks alone produce one per second
+
+_fonts: dict[tuple, pg.font.Font] = {}
+_texts: OrderedDict[tuple, pg.Surface] = OrderedDict()
+
+
+def get_font(font: str | os.PathLike | None, size: int) -> pg.font.Font:
+    """
+    The shared Font for a file path, a system font name, or None for
+    pygame's default font, loaded once per (font, size).
+    """
+    name = os.fspath(font) if font is not None else None
+    key = (name, size)
+    loaded = _fonts.get(key)
+    if loaded is None:
+        if name is None:
+            loaded = pg.font.Font(None, size)
+        elif os.path.isfile(name):
+            loaded = pg.font.Font(name, size)
+        else:
+            loaded = pg.font.SysFont(name, size)
+        _fonts[key] = loaded
+    return loaded
+
+
+def render_text(
+        font: str | os.PathLike | None,
+        size: int,
+        text: str,
+        color: Tuple[int, int, int],
+        antialias: bool = True,
+) -> pg.Surface:
+    """
+    `text` rendered in `font` at `size`, reused while it stays among the
+    TEXT_CACHE_SIZE most recently used labels.  Callers share the surface,
+    so they must not draw on it.
+    """
+    key = (os.fspath(font) if font is not None else None, size, text, tuple(color), antialias)
+    surface = _texts.get(key)
+    if surface is not None:
+        _texts.move_to_end(key)
+        return surface
+    surface = get_font(font, size).render(text, antialias, color)
+    _texts[key] = surface
+    if len(_texts) > TEXT_CACHE_SIZE:
+        _texts.popitem(last=False)
+    return surface
+
+
+def clear_text_cache() -> None:
+    _texts.clear()
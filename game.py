@@ -0,0 +1,165 @@
+"""
+Headless game controller.
+
+Game owns everything about a game except drawing and input: the board,
+the game state, the history, the clocks and the result.  run_chess_gui
+drives one from pygame events; selfplay.py drives many with no display at
+all.  Nothing here imports pygame.
+"""
+from typing import Optional
+
+from piece import Piece
+from chessMove import Move, MOVE_RE, pos_to_index
+from chessHistory import GameHistory
+from chessAttack import AttackMap
+from chessStatus import GameStatus
+
+START_CLOCK = 600   # seconds (10 minutes)
+
+
+def new_game_state():
+    return {
+        "lastMove": None,
+        "turnCount": 1,           # now storing numeric turn
+        "turn": "white",
+        "castling": "KQkq",       # 말이 움직였는지는 말 대신 여기에 기록
+        "enPassant": None,
+        "swapsUsed": (),          # 스왑을 쓴 쪽
+    }
+
+
+def create_initial_board():
+    board = [[None for _ in range(8)] for _ in range(8)]
+    order = ["rook", "knight", "bishop", "queen", "king", "bishop", "knight", "rook"]
+    for i in range(8):
+        board[0][i] = Piece("black", order[i])
+        board[1][i] = Piece("black", "pawn")
+        board[6][i] = Piece("white", "pawn")
+        board[7][i] = Piece("white", order[i])
+    return board
+
+
+class Game:
+    """
+    One game from the initial position.  `clock` is each side's time in
+    seconds, or None for untimed games; tick() charges elapsed time to the
+    side to move.  Every method that changes the board keeps the attack map
+    and the cached status in step and re-checks the result.
+    """
+
+    def __init__(self, board=None, clock: Optional[float] = START_CLOCK):
+        self.clock = clock
+        self.version = 0        # bumped whenever the board changes, so views can tell they are stale
+        self.restart(board)
+
+    def restart(self, board=None) -> None:
+        self.board = board if board is not None else create_initial_board()
+        self.state = new_game_state()
+        self.history = GameHistory(self.board, self.state)
+        self.attack_map = AttackMap(self.board)
+        self.status = GameStatus()
+        self.turn_count = 1
+        self.times = {"white": self.clock, "black": self.clock}
+        self.result = None              # "1-0", "0-1", "1/2-1/2" once the game is over
+        self.result_message = ""
+        self.version += 1
+
+    @property
+    def turn(self) -> str:
+        return self.state["turn"]
+
+    @property
+    def game_over(self) -> bool:
+        return self.result is not None
+
+    def refresh(self) -> bool:
+        """Bring the cached status up to date; True if it had to be recomputed."""
+        return self.status.refresh(self.board, self.state, self.turn)
+
+    def legal_moves(self):
+        self.refresh()
+        return self.status.legal_moves
+
+    def find_move(self, move_str: str) -> Optional[Move]:
+        """The legal move a "Piece-e2-e4" string names, or None."""
+        match = MOVE_RE.search(move_str or "")
+        if not match:
+            return None
+        from_row, from_col = pos_to_index(match.group(2))
+        to_row, to_col = pos_to_index(match.group(3))
+        self.refresh()
+        return self.status.find_move(from_row, from_col, to_row, to_col)
+
+    def play(self, move: Move):
+        """Play a legal move of the side to move; returns the Undo."""
+        # 캐슬링, 앙파상, 프로모션
+        before = dict(self.state)
+        self.state["turnCount"] = self.turn_count
+        undo = self.history.push_move(self.board, self.state, move, before)
+        self.attack_map.update(self.board, undo.changed)
+        self.version += 1
+        self.status.invalidate()
+        self.turn_count += 1
+        self.check_result()
+        return undo
+
+    def swap(self, first, second):
+        """Swap two pieces of the side to move (once per player); returns the changed squares."""
+        # 자리를 바꾼 룩은 캐슬링 권리를 잃음, 스왑도 기록에 남김
+        changed = self.history.push_swap(self.board, self.state, first, second)
+        self.attack_map.update(self.board, changed)
+        self.version += 1
+        self.status.invalidate()
+        self.check_result()
+        return changed
+
+    def can_swap(self) -> bool:
+        return self.turn not in self.state["swapsUsed"]
+
+    def seek(self, target: int) -> bool:
+        """Move through the history to the position after `target` entries; False if out of range."""
+        if not 0 <= target <= len(self.history):
+            return False
+        changed = self.history.seek(self.board, self.state, target)
+        self.attack_map.update(self.board, changed)
+        self.version += 1
+        self.status.invalidate()
+        self.turn_count = self.history.moves_played + 1
+        self.check_result()
+        return True
+
+    def tick(self, elapsed: float) -> None:
+        """Charge `elapsed` seconds to the side to move."""
+        if self.clock is None or self.game_over:
+            return
+        self.times[self.turn] -= elapsed
+        self.check_result()
+
+    def check_result(self) -> Optional[str]:
+        """Set the result if the game just ended on time, by mate, stalemate, bare material or a tablebase draw."""
+        if self.game_over:
+            return self.result
+        if self.clock is not None and self.times["white"] <= 0:
+            self.result, self.result_message = "0-1", "Black wins on time"
+        elif self.clock is not None and self.times["black"] <= 0:
+            self.result, self.result_message = "1-0", "White wins on time"
+        else:
+            self.refresh()
+            if self.status.checkmate:
+                winner = "White" if self.turn == "black" else "Black"
+                self.result = "1-0" if winner == "White" else "0-1"
+                self.result_message = f"{winner} wins by checkmate"
+            elif self.status.stalemate:
+                self.result, self.result_message = "1/2-1/2", "Stalemate"
+            elif self.status.dead_draw:
+                self.result, self.result_message = "1/2-1/2", "Draw: insufficient material"
+            elif self.status.tablebase_draw:
+                self.result, self.result_message = "1/2-1/2", "Draw: tablebase"
+        return self.result
+
+    def adjudicate(self, result: str, message: str) -> None:
+        """End the game from outside, e.g. on a move limit."""
+        self.result, self.result_message = result, message
+
+    def move_log(self):
+        return self.history.move_log()
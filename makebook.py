@@ -0,0 +1,142 @@
+"""
+Build a chessBook .bin opening book from a PGN collection.
+
+    python -m makebook games.pgn                       # writes book.bin
+    python -m makebook a.pgn b.pgn -o book.bin --plies 20 --min-count 2
+    python -m makebook games.pgn --weights count        # ignore results
+
+Every position in the first `--plies` plies of each game gets an entry for
+the move played.  With `--weights results` (default) a move scores 2 for a
+win of the side that played it, 1 for a draw and 0 for a loss, as Polyglot
+does; `--weights count` scores every game 1.  Moves seen fewer than
+`--min-count` times are left out.
+"""
+import argparse
+import re
+import sys
+from collections import Counter, defaultdict
+
+from chessBook import BOOK_PATH, BookEntry, encode_move, write_book
+from chessPolyglot import polyglot_key
+from chessPosition import Position, START_FEN
+
+TAG_RE = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+SAN_RE = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+SAN_KINDS = {"N": "knight", "B": "bishop", "R": "rook", "Q": "queen", "K": "king", None: "pawn"}
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+
+def read_games(lines):
+    """Yield (tags, movetext) for every game of a PGN file."""
+    tags, moves = {}, []
+    for line in lines:
+        line = line.strip()
+        match = TAG_RE.match(line)
+        if match:
+            if moves:
+                yield tags, " ".join(moves)
+                tags, moves = {}, []
+            tags[match.group(1)] = match.group(2)
+        elif line and not line.startswith("%"):
+            moves.append(line)
+    if moves:
+        yield tags, " ".join(moves)
+
+
+def san_tokens(movetext):
+    """SAN moves of the main line: comments, variations, NAGs and move numbers dropped."""
+    text = re.sub(r"\{[^}]*\}|;[^\n]*", " ", movetext)
+    while True:
+        stripped = re.sub(r"\([^()]*\)", " ", text)
+        if stripped == text:
+            break
+        text = stripped
+    for token in text.split():
+        token = re.sub(r"^\d+\.+", "", token)
+        if not token or token.startswith("$") or token in RESULTS:
+            continue
+        yield token
+
+
+def parse_san(position, san):
+    """Return the legal Move `san` names in `position`, or None."""
+    san = san.rstrip("+#!?")
+    if san in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        long_side = len(san) > 3
+        for move in position.iter_legal_moves():
+            if move.flag == "castle" and (move.to_col < move.from_col) == long_side:
+                return move
+        return None
+    match = SAN_RE.match(san)
+    if not match:
+        return None
+    piece, from_file, from_rank, target, promotion = match.groups()
+    kind = SAN_KINDS[piece]
+    to_row, to_col = 8 - int(target[1]), ord(target[0]) - 97
+    promotion = SAN_KINDS[promotion] if promotion else None
+    candidates = [
+        move for move in position.iter_legal_moves()
+        if move.kind == kind and move.to_row == to_row and move.to_col == to_col
+        and move.promotion == promotion
+        and (from_file is None or move.from_col == ord(from_file) - 97)
+        and (from_rank is None or move.from_row == 8 - int(from_rank))
+    ]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def collect(paths, plies, weights):
+    """
+    Return (scores, counts, games, skipped): score and number of games per
+    (Polyglot key, Polyglot move), games read, and games cut short by a move
+    that could not be read.
+    """
+    scores = defaultdict(int)
+    counts = Counter()
+    games = skipped = 0
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for tags, movetext in read_games(f):
+                games += 1
+                result = tags.get("Result", "*")
+                position = Position.from_fen(tags.get("FEN", START_FEN))
+                for ply, san in enumerate(san_tokens(movetext)):
+                    if ply >= plies:
+                        break
+                    move = parse_san(position, san)
+                    if move is None:
+                        skipped += 1
+                        break
+                    key = (polyglot_key(position), encode_move(move))
+                    counts[key] += 1
+                    if weights == "count" or result == "1/2-1/2":
+                        scores[key] += 1
+                    else:
+                        # losses stay in the book with weight 0
+                        scores[key] += 2 if result == ("1-0" if position.side == 0 else "0-1") else 0
+                    position.make_move(move)
+    return scores, counts, games, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an opening book from PGN files")
+    parser.add_argument("pgn", nargs="+")
+    parser.add_argument("-o", "--output", default=BOOK_PATH)
+    parser.add_argument("--plies", type=int, default=16, help="book depth in plies")
+    parser.add_argument("--min-count", type=int, default=1, help="drop moves played fewer times")
+    parser.add_argument("--weights", choices=("results", "count"), default="results")
+    args = parser.parse_args(argv)
+
+    scores, counts, games, skipped = collect(args.pgn, args.plies, args.weights)
+    kept = {key: score for key, score in scores.items() if counts[key] >= args.min_count}
+    top = max(kept.values(), default=0)
+    scale = 65535 / top if top > 65535 else 1      # weights are 16 bits
+    entries = [BookEntry(key, move, max(1, int(score * scale)) if score else 0)
+               for (key, move), score in kept.items()]
+    written = write_book(args.output, entries)
+    print(f"{games} games, {skipped} stopped at an unreadable move, "
+          f"{written} entries for {len({key for key, _ in kept})} positions -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Retrograde generator for the chessTablebase tables.
+
+    python -m maketablebase                  # KQK, KRK and KPK into tablebases/
+    python -m maketablebase KRK -o /tmp/tb
+
+Starting from the checkmates, the generator walks backwards: a position
+where the strong side can move into a lost position is won one ply later,
+and a position where every move of the lone king leads to a won position
+is lost one ply later.  Positions never reached that way are draws.  KPK
+needs KQK and KRK first, for the promotions.
+"""
+import argparse
+import os
+import sys
+import time
+
+from chessPosition import KING_MASKS, PAWN_MASKS, ROOK_DIRS, QUEEN_DIRS, iter_bits, slider_attacks
+from chessTablebase import DRAW, LOSS, ILLEGAL, TABLE_SIZE, TABLEBASE_DIR, table_index
+
+PIECES = {"KQK": "queen", "KRK": "rook", "KPK": "pawn"}
+ORDER = ("KQK", "KRK", "KPK")
+
+
+def piece_attacks(kind, sq, occupied):
+    if kind == "queen":
+        return slider_attacks(sq, occupied, QUEEN_DIRS)
+    if kind == "rook":
+        return slider_attacks(sq, occupied, ROOK_DIRS)
+    return PAWN_MASKS[0][sq]
+
+
+def piece_squares(kind):
+    # a white pawn stands on ranks 2-7 (rows 6..1)
+    return range(8, 56) if kind == "pawn" else range(64)
+
+
+def unmoves(kind, wk, wx, bk):
+    """Squares the piece on `wx` may have come from."""
+    occupied = 1 << wk | 1 << wx | 1 << bk
+    if kind != "pawn":
+        return list(iter_bits(piece_attacks(kind, wx, occupied) & ~occupied))
+    result = []
+    if wx + 8 < 56 and not occupied >> (wx + 8) & 1:
+        result.append(wx + 8)
+        if 32 <= wx < 40 and not occupied >> (wx + 16) & 1:
+            result.append(wx + 16)
+    return result
+
+
+def generate(name, promotions=None):
+    """Return the table for `name` as a bytearray; `promotions` maps kind -> finished table."""
+    kind = PIECES[name]
+    table = bytearray([ILLEGAL]) * TABLE_SIZE
+    counters = bytearray(64 * 64 * 64)
+    # attacks on the lone king's squares, which do not block (x-ray through it)
+    attacks = {(wk, wx): piece_attacks(kind, wx, 1 << wk) for wk in range(64) for wx in piece_squares(kind)}
+    lost = {0: []}
+    won = {}
+
+    for wk in range(64):
+        for wx in piece_squares(kind):
+            if wx == wk:
+                continue
+            guarded = KING_MASKS[wk] | attacks[wk, wx] | 1 << wk
+            for bk in range(64):
+                if bk in (wk, wx) or KING_MASKS[wk] >> bk & 1:
+                    continue
+                in_check = attacks[wk, wx] >> bk & 1
+                if not in_check:
+                    table[table_index(0, wk, wx, bk)] = DRAW
+                escapes = (KING_MASKS[bk] & ~guarded).bit_count()
+                index = table_index(1, wk, wx, bk)
+                if escapes:
+                    table[index] = DRAW
+                    counters[index & 0x3FFFF] = escapes
+                elif in_check:
+                    table[index] = LOSS
+                    lost[0].append(index)
+                else:
+                    table[index] = DRAW         # stalemate
+
+    # promotions: white to move with a pawn on the 7th rank wins if a promotion does
+    seeds = {}
+    if kind == "pawn" and promotions:
+        for wk in range(64):
+            for wx in range(8, 16):
+                for bk in range(64):
+                    index = table_index(0, wk, wx, bk)
+                    if table[index] != DRAW or wx - 8 in (wk, bk):
+                        continue
+                    best = None
+                    for promoted in promotions.values():
+                        value = promoted[table_index(1, wk, wx - 8, bk)]
+                        if LOSS <= value < ILLEGAL and (best is None or value - LOSS + 1 < best):
+                            best = value - LOSS + 1
+                    if best is not None:
+                        seeds.setdefault(best, []).append(index)
+
+    depth = 0
+    while depth < LOSS - 1 and (lost.get(depth) or won.get(depth) or any(d >= depth for d in seeds)):
+        for index in seeds.pop(depth, ()):
+            if table[index] == DRAW:
+                table[index] = depth
+                won.setdefault(depth, []).append(index)
+
+        # strong side to move, one move away from a lost position: won
+        for index in lost.get(depth, ()):
+            wk, wx, bk = index >> 12 & 63, index >> 6 & 63, index & 63
+            for prev_wk in iter_bits(KING_MASKS[wk] & ~KING_MASKS[bk] & ~(1 << wx) & ~(1 << bk)):
+                prev = table_index(0, prev_wk, wx, bk)
+                if table[prev] == DRAW:
+                    table[prev] = depth + 1
+                    won.setdefault(depth + 1, []).append(prev)
+            for prev_wx in unmoves(kind, wk, wx, bk):
+                prev = table_index(0, wk, prev_wx, bk)
+                if table[prev] == DRAW:
+                    table[prev] = depth + 1
+                    won.setdefault(depth + 1, []).append(prev)
+
+        # lone king to move and every reply runs into a won position: lost
+        for index in won.get(depth, ()):
+            wk, wx, bk = index >> 12 & 63, index >> 6 & 63, index & 63
+            for prev_bk in iter_bits(KING_MASKS[bk] & ~KING_MASKS[wk] & ~(1 << wk) & ~(1 << wx)):
+                prev = table_index(1, wk, wx, prev_bk)
+                if table[prev] != DRAW:
+                    continue
+                counters[prev & 0x3FFFF] -= 1
+                if not counters[prev & 0x3FFFF]:
+                    table[prev] = LOSS + depth + 1
+                    lost.setdefault(depth + 1, []).append(prev)
+        depth += 1
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate endgame tablebases")
+    parser.add_argument("tables", nargs="*", metavar="TABLE", help="any of KQK KRK KPK (default all)")
+    parser.add_argument("-o", "--output", default=TABLEBASE_DIR)
+    args = parser.parse_args(argv)
+    unknown = set(args.tables) - set(ORDER)
+    if unknown:
+        parser.error(f"unknown table(s): {' '.join(sorted(unknown))}")
+
+    os.makedirs(args.output, exist_ok=True)
+    wanted = [name for name in ORDER if name in (args.tables or ORDER)]
+    if "KPK" in wanted:
+        wanted = list(dict.fromkeys(["KQK", "KRK"] + wanted))
+    done = {}
+    for name in wanted:
+        started = time.perf_counter()
+        promotions = {"queen": done["KQK"], "rook": done["KRK"]} if name == "KPK" else None
+        table = generate(name, promotions)
+        done[name] = table
+        with open(os.path.join(args.output, f"{name}.tb"), "wb") as f:
+            f.write(table)
+        wins = sum(1 for value in table[:TABLE_SIZE // 2] if 0 < value < LOSS)
+        longest = max((value for value in table[:TABLE_SIZE // 2] if 0 < value < LOSS), default=0)
+        print(f"{name}: {wins} wins for the side with the piece to move, longest mate {longest} plies, "
+              f"{time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Load generator for the model client: drives get_ai_answer from many threads
+and reports throughput and latency percentiles.  Runs against the local
+stand-in server unless --url is given.
+
+    python -m model.loadgen -c 8 -n 400                    # 8 concurrent callers
+    python -m model.loadgen --no-stream --token-rate 30    # single-response mode
+    python -m model.loadgen --error-rate 0.1 --stall-rate 0.05 --read-timeout 1
+    python -m model.loadgen --cache -n 1000                # repeated positions hit the cache
+    python -m model.loadgen --url http://localhost:11434   # a real Ollama host
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import replace
+
+from model.mock_server import MockOllama
+from model.ollama import DEFAULT_CONFIG, PROMPT_FORMATS, ResponseCache, get_ai_answer, reset_session
+from perft import POSITIONS, board_from_fen
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def drive(config, boards, requests_total, concurrency, cache=None):
+    """Send `requests_total` requests from `concurrency` threads; return (latencies, failures, seconds)."""
+    latencies, failures = [], Counter()
+    lock = threading.Lock()
+    counter = iter(range(requests_total))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            try:
+                get_ai_answer(boards[i % len(boards)], config, cache)
+            except Exception as e:
+                with lock:
+                    failures[type(e).__name__] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for model.ollama")
+    parser.add_argument("-c", "--concurrency", type=int, default=4)
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("--url", help="model host to load instead of the local stand-in")
+    parser.add_argument("--model", default=DEFAULT_CONFIG.model)
+    parser.add_argument("--no-stream", action="store_true", help="ask for single-response answers")
+    parser.add_argument("--format", choices=PROMPT_FORMATS, default="board")
+    parser.add_argument("--cache", action="store_true", help="answer repeated positions from a fresh ResponseCache")
+    parser.add_argument("--connect-timeout", type=float, default=DEFAULT_CONFIG.connect_timeout)
+    parser.add_argument("--read-timeout", type=float, default=DEFAULT_CONFIG.read_timeout)
+    parser.add_argument("--base-ms", type=float, default=5.0, help="stand-in: fixed cost per request")
+    parser.add_argument("--prompt-ms", type=float, default=0.2, help="stand-in: milliseconds per prompt token")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="stand-in: answer tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stand-in: fraction answered with HTTP 500")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="stand-in: fraction delayed by --stall-ms")
+    parser.add_argument("--stall-ms", type=float, default=5000.0)
+    parser.add_argument("-o", "--output", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    boards = [board_from_fen(fen)[0] for fen, _ in POSITIONS.values()]
+    reset_session(pool_maxsize=max(args.concurrency, 4))
+    mock = None
+    if args.url is None:
+        mock = MockOllama(base_ms=args.base_ms, prompt_ms=args.prompt_ms, token_rate=args.token_rate,
+                          error_rate=args.error_rate, stall_rate=args.stall_rate, stall_ms=args.stall_ms,
+                          seed=0).start()
+    config = replace(DEFAULT_CONFIG, host=args.url or mock.url, model=args.model, stream=not args.no_stream,
+                     prompt_format=args.format, connect_timeout=args.connect_timeout,
+                     read_timeout=args.read_timeout)
+    cache = ResponseCache() if args.cache else None
+    try:
+        latencies, failures, seconds = drive(config, boards, args.requests, args.concurrency, cache)
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    latencies.sort()
+    report = {
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "ok": len(latencies),
+        "failures": dict(failures),
+        "seconds": seconds,
+        "throughput_rps": len(latencies) / seconds if seconds > 0 else 0.0,
+        "stream": config.stream,
+        "prompt_format": config.prompt_format,
+    }
+    if latencies:
+        report.update({
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p90_ms": percentile(latencies, 0.90) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": latencies[-1] * 1000,
+        })
+    if cache is not None:
+        report["cache_hit_rate"] = cache.hit_rate
+    if mock is not None:
+        report["server"] = mock.stats()
+
+    print(f"{report['ok']}/{args.requests} ok in {seconds:.2f}s, {report['throughput_rps']:.1f} req/s "
+          f"at concurrency {args.concurrency}")
+    if latencies:
+        print(f"latency ms: mean {report['mean_ms']:.1f}  p50 {report['p50_ms']:.1f}  p90 {report['p90_ms']:.1f}  "
+              f"p99 {report['p99_ms']:.1f}  max {report['max_ms']:.1f}")
+    if failures:
+        print("failures: " + ", ".join(f"{name} x{count}" for name, count in failures.most_common()))
+    if "cache_hit_rate" in report:
+        print(f"cache hit rate: {report['cache_hit_rate']:.0%}")
+    if mock is not None:
+        print("server: " + ", ".join(f"{k} {v}" for k, v in report["server"].items()))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if not failures or args.error_rate or args.stall_rate else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
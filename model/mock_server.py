@@ -0,0 +1,228 @@
+"""
+Local stand-in for the Ollama /api/generate endpoint, so the model path can
+be measured and tested without a model host.
+
+    python -m model.mock_server --port 11500 --prompt-ms 0.5 --token-rate 40
+    python -m model.mock_server --error-rate 0.1 --stall-rate 0.05
+
+Both the streamed (one JSON object per line, the default like Ollama) and
+the single-response mode are served.  A request costs `base_ms`, plus
+`prompt_ms` per prompt token, plus one `1 / token_rate` second per answer
+token.  The answer is the first move of a "legal moves are: ..." line in the
+prompt, or `answer`, followed by some chatter so that clients stopping at
+the first move have something to skip.  `error_rate` of the requests get an
+HTTP 500 and `stall_rate` of them wait `stall_ms` before the first byte.
+
+A streaming client that closes the connection once it has read the move
+is counted in `stopped_early`; one that hangs up before the move arrived
+(a read timeout, say) is counted in `aborted`.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# rough stand-in for a BPE tokenizer: words and single punctuation marks
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+ANSWER_TOKEN_RE = re.compile(r"\s*(?:\w+|[^\w\s])")
+LEGAL_RE = re.compile(r"legal moves are: ([A-Za-z]+-[a-h][1-8]-[a-h][1-8])", re.IGNORECASE)
+MOVE_RE = re.compile(r"[A-Za-z]+-[a-h][1-8]-[a-h][1-8]")
+
+CHATTER = " because it develops a piece and fights for the centre."
+
+
+def count_tokens(text):
+    return len(TOKEN_RE.findall(text))
+
+
+class MockOllama:
+    """Threaded HTTP server answering /api/generate; use as a context manager."""
+
+    def __init__(self, host="127.0.0.1", port=0, base_ms=5.0, prompt_ms=0.2, token_rate=None,
+                 error_rate=0.0, stall_rate=0.0, stall_ms=5000.0, answer="pawn-e7-e5", chatter=True, seed=None):
+        self.base_ms = base_ms
+        self.prompt_ms = prompt_ms
+        self.token_rate = token_rate            # answer tokens per second, None for instant
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall_ms = stall_ms
+        self.answer = answer
+        self.chatter = chatter
+        self.requests = 0
+        self.errors = 0
+        self.stalls = 0
+        self.aborted = 0                        # clients that hung up before their move was sent
+        self.stopped_early = 0                  # streams closed by the client once it had the move
+        self.prompt_tokens = 0
+        self.eval_tokens = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reply_for(self, prompt):
+        match = LEGAL_RE.search(prompt)
+        move = match.group(1) if match else self.answer
+        return move + (CHATTER if self.chatter else "")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "stalls": self.stalls,
+                "aborted": self.aborted,
+                "stopped_early": self.stopped_early,
+                "prompt_tokens": self.prompt_tokens,
+                "eval_tokens": self.eval_tokens,
+            }
+
+    def _roll(self, rate):
+        with self._lock:
+            return rate > 0 and self._random.random() < rate
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # the client gave up (read timeout) while we were stalling
+                    with mock._lock:
+                        mock.aborted += 1
+                    self.close_connection = True
+
+            def _write_chunk(self, payload):
+                data = json.dumps(payload).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                prompt = body.get("prompt", "")
+                tokens = count_tokens(prompt)
+                with mock._lock:
+                    mock.requests += 1
+                    mock.prompt_tokens += tokens
+
+                if mock._roll(mock.stall_rate):
+                    with mock._lock:
+                        mock.stalls += 1
+                    time.sleep(mock.stall_ms / 1000)
+                time.sleep((mock.base_ms + mock.prompt_ms * tokens) / 1000)
+                if mock._roll(mock.error_rate):
+                    with mock._lock:
+                        mock.errors += 1
+                    self._send_json(500, {"error": "injected failure"})
+                    return
+
+                pieces = ANSWER_TOKEN_RE.findall(mock.reply_for(prompt))
+                delay = 1 / mock.token_rate if mock.token_rate else 0.0
+                context = list(body.get("context") or []) + [tokens + len(pieces)]
+                final = {
+                    "model": body.get("model"),
+                    "done": True,
+                    "context": context,
+                    "prompt_eval_count": tokens,
+                    "eval_count": len(pieces),
+                }
+
+                if not body.get("stream", True):
+                    time.sleep(delay * len(pieces))
+                    with mock._lock:
+                        mock.eval_tokens += len(pieces)
+                    self._send_json(200, dict(final, response="".join(pieces)))
+                    return
+
+                sent = ""
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for piece in pieces:
+                        time.sleep(delay)
+                        self._write_chunk({"model": body.get("model"), "response": piece, "done": False})
+                        sent += piece
+                        with mock._lock:
+                            mock.eval_tokens += 1
+                    self._write_chunk(dict(final, response=""))
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # a client that already has its move stops reading on purpose; that is not a failure
+                    with mock._lock:
+                        if MOVE_RE.search(sent):
+                            mock.stopped_early += 1
+                        else:
+                            mock.aborted += 1
+                    self.close_connection = True
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--base-ms", type=float, default=5.0)
+    parser.add_argument("--prompt-ms", type=float, default=0.2, help="milliseconds per prompt token")
+    parser.add_argument("--token-rate", type=float, default=None, help="answer tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fraction of requests delayed by --stall-ms")
+    parser.add_argument("--stall-ms", type=float, default=5000.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    mock = MockOllama(args.host, args.port, args.base_ms, args.prompt_ms, args.token_rate,
+                      args.error_rate, args.stall_rate, args.stall_ms, seed=args.seed)
+    print(f"listening on {mock.url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,22 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from chessMove import position_from_board
 
 prompts_front = [
     "Forget every chess moves I gave before",
     "You will play the chess. I will give the board and return the best move.",
-    "You are white",
+    "You are {color}",
     "The map will given from the a8, b8, c8, ..., h8, a7, b7, ..., a1, b1, c1, ..., h1",
     "Examples: black-rook, black-knight, ..., none, ..., white-knight, white-rook",
     "You return the string in the format: <piece>-<from>-<to>",
@@ -30,23 +43,519 @@ prompts_log = [
     "No other characters should be given",
 ]
 
-def get_ai_answer(board):
-    board_list = []
+
+# bump whenever the prompts change so cached answers to old prompts are not reused
+PROMPT_VERSION = 2
+
+
+@dataclass
+class OllamaConfig:
+    host: str = os.environ.get("OLLAMA_HOST", "http://192.168.219.104:11434")
+    model: str = "llama3.2"
+    connect_timeout: float = 3.0    # seconds to open the connection
+    read_timeout: float = 60.0      # seconds to wait between bytes of the answer
+    stream: bool = True             # read tokens as they come and stop at the first move
+    prompt_format: str = "board"    # one of PROMPT_FORMATS
+
+    @property
+    def generate_url(self):
+        return self.host.rstrip("/") + "/api/generate"
+
+
+DEFAULT_CONFIG = OllamaConfig()
+
+# model calls run here so the pygame loop never waits on the network
+MAX_WORKERS = 2
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ollama")
+
+# a complete <piece>-<from>-<to> answer; streaming stops as soon as one shows up
+ANSWER_RE = re.compile(r"\b(pawn|knight|bishop|rook|queen|king)-([a-h][1-8])-([a-h][1-8])\b", re.IGNORECASE)
+
+_session = None
+_session_lock = threading.Lock()
+_pool_maxsize = MAX_WORKERS * 2
+
+
+def get_session():
+    """Shared keep-alive session, sized so every worker can hold a connection."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_pool_maxsize)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def reset_session(pool_maxsize=None):
+    """Close the shared session; the next request opens a new one with `pool_maxsize` connections per host."""
+    global _session, _pool_maxsize
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if pool_maxsize is not None:
+            _pool_maxsize = pool_maxsize
+
+
+def board_to_prompt_rows(board):
+    rows = []
     for pieceList in board:
         board_str = ""
         for piece in pieceList:
-            board_str += piece + " "
-        board_list.append(board_str)
+            board_str += (str(piece) if piece else "none") + " "
+        rows.append(board_str)
+    return rows
+
+
+# "board": 64 words like black-rook/none; "fen": FEN piece placement;
+# "pieces": only the occupied squares, e.g. "White: Ke1 Qd1 Pe2"
+PROMPT_FORMATS = ("board", "fen", "pieces")
+PIECE_LETTERS = {"pawn": "p", "knight": "n", "bishop": "b", "rook": "r", "queen": "q", "king": "k"}
+
+prompts_compact = [
+    "You play chess as {color}. Return the best move.",
+    "Answer only <piece>-<from>-<to>, piece one of pawn, knight, bishop, rook, queen, king. Example: pawn-e2-e4",
+]
+
+
+def board_to_placement(board):
+    """Piece placement field of FEN, rank 8 first."""
+    ranks = []
+    for row in board:
+        rank, empty = "", 0
+        for piece in row:
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                rank, empty = rank + str(empty), 0
+            letter = PIECE_LETTERS[piece.kind]
+            rank += letter.upper() if piece.color == "white" else letter
+        ranks.append(rank + (str(empty) if empty else ""))
+    return "/".join(ranks)
+
+
+def board_to_fen(board, color="white", state=None):
+    """
+    Full FEN of `board` with `color` to move.  Castling rights and the
+    en-passant square come from `state` (a game_state) when given.
+    """
+    fen = position_from_board(board, state, color).fen()
+    return board_to_placement(board) + fen[fen.index(" "):]
+
+
+def board_to_piece_list(board):
+    """One line per side listing the occupied squares, king first."""
+    order = ("king", "queen", "rook", "bishop", "knight", "pawn")
+    lines = []
+    for color in ("white", "black"):
+        pieces = [(order.index(piece.kind), f"{chr(c + 97)}{8 - r}", piece.kind)
+                  for r, row in enumerate(board) for c, piece in enumerate(row)
+                  if piece is not None and piece.color == color]
+        pieces.sort()
+        lines.append(f"{color.capitalize()}: " + " ".join(
+            PIECE_LETTERS[kind].upper() + square for _, square, kind in pieces))
+    return lines
+
+
+def encode_board(board, prompt_format="board", color="white", state=None):
+    """The prompt lines describing the position in `prompt_format`."""
+    if prompt_format == "board":
+        return ["The map will given from the a8, b8, c8, ..., h8, a7, b7, ..., a1, b1, c1, ..., h1",
+                "Now the map is:"] + board_to_prompt_rows(board)
+    if prompt_format == "fen":
+        return ["Position (FEN): " + board_to_fen(board, color, state)]
+    if prompt_format == "pieces":
+        return ["Pieces (K king, Q queen, R rook, B bishop, N knight, P pawn):"] + board_to_piece_list(board)
+    raise ValueError(f"unknown prompt format {prompt_format!r}, expected one of {PROMPT_FORMATS}")
+
+
+def build_board_prompt(board, prompt_format="board", color="white", state=None):
+    """The whole get_ai_answer prompt for `board` with `color` to move."""
+    if prompt_format == "board":
+        lines = prompts_front + board_to_prompt_rows(board) + prompts_rear
+    else:
+        lines = prompts_compact[:1] + encode_board(board, prompt_format, color, state) + prompts_compact[1:]
+    return "\n".join(line.format(color=color) for line in lines)
+
+
+def prompt_version(prompt_format="board"):
+    """Cache version for a prompt format; the original board prompt keeps PROMPT_VERSION."""
+    return PROMPT_VERSION if prompt_format == "board" else f"{PROMPT_VERSION}-{prompt_format}"
+
+
+def position_key(board):
+    """Normalized text of the position, independent of how the board is stored."""
+    return "/".join(",".join(str(piece) if piece else "none" for piece in row) for row in board)
+
+
+class ResponseCache:
+    """
+    Model answers keyed by (position, model, prompt version).  Holds at most
+    `capacity` answers in memory, evicting the least recently used.  With a
+    `path`, every new answer is appended to that JSON-lines file and the file
+    is read back on construction, so answers survive restarts.
+    """
+
+    def __init__(self, capacity=1024, path=None):
+        self.capacity = capacity
+        self.path = path
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def make_key(board, model, prompt_version=PROMPT_VERSION, host="", side=""):
+        # the host is part of the key: two servers may serve different weights under one model
+        # name; `side` is the rest of what the prompt says about the position (side to move,
+        # castling, en passant)
+        raw = f"{host}\0{model}\0{prompt_version}\0{side}\0{position_key(board)}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._remember(record["key"], record["response"])
+                except (ValueError, KeyError):
+                    continue    # torn last line after a crash
+
+    def _remember(self, key, response):
+        self.items[key] = response
+        self.items.move_to_end(key)
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            response = self.items.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return response
 
-    prompts = prompts_front + board_list + prompts_rear
+    def put(self, key, response):
+        with self._lock:
+            self._remember(key, response)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "response": response}) + "\n")
 
-    response = requests.post(
-        "http://192.168.219.104:11434/api/generate",
+    def compact(self):
+        """Rewrite the on-disk store with only the answers still in memory."""
+        if not self.path:
+            return
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for key, response in self.items.items():
+                    f.write(json.dumps({"key": key, "response": response}) + "\n")
+            os.replace(tmp_path, self.path)
+
+    def clear(self):
+        with self._lock:
+            self.items.clear()
+            self.hits = self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"size": len(self.items), "capacity": self.capacity,
+                "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+RESPONSE_CACHE = ResponseCache(path=os.environ.get("OLLAMA_CACHE_PATH"))
+
+
+def get_ai_answer(board, config=None, cache=RESPONSE_CACHE, cancel_event=None, color="white", state=None):
+    """
+    Ask the model for a move for `color`; answers for positions already
+    asked come from `cache`, which keeps only the "Piece-e2-e4" part of
+    answers that had one.  Setting `cancel_event` stops a streaming answer
+    early.
+    """
+    config = config or DEFAULT_CONFIG
+    key = None
+    if cache is not None:
+        side = board_to_fen(board, color, state).split(" ", 1)[1]
+        key = cache.make_key(board, config.model, prompt_version(config.prompt_format),
+                             config.host, side)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    answer = generate(build_board_prompt(board, config.prompt_format, color, state), config, cancel_event)
+
+    # only a readable move is worth replaying; chatter or a cut-off stream would stick to the position
+    match = ANSWER_RE.search(answer or "")
+    if cache is not None and match and (cancel_event is None or not cancel_event.is_set()):
+        cache.put(key, match.group(0))
+    return answer
+
+
+def generate(prompt, config=None, cancel_event=None, deadline=None):
+    """
+    Send one prompt and return the model's text.  `deadline` is a
+    time.perf_counter() value; a streaming answer still running then is cut
+    off and whatever arrived is returned.
+    """
+    config = config or DEFAULT_CONFIG
+    if config.stream:
+        return _generate_streaming(config, prompt, cancel_event, deadline)
+    return _generate(config, prompt)
+
+
+def _generate(config, prompt):
+    response = get_session().post(
+        config.generate_url,
         json={
-            "model": "llama3.2",
-            "prompt": "\n".join(prompts),
+            "model": config.model,
+            "prompt": prompt,
             "stream": False
-        }
+        },
+        timeout=(config.connect_timeout, config.read_timeout),
     )
-
+    response.raise_for_status()
     return response.json()["response"]
+
+
+def _generate_streaming(config, prompt, cancel_event=None, deadline=None):
+    """
+    Read the token stream and return as soon as the text holds a complete
+    move.  Closing the response drops the connection, which makes the server
+    stop generating.  Returns whatever arrived if the model finishes (or the
+    request is cancelled) without a move.
+    """
+    response = get_session().post(
+        config.generate_url,
+        json={
+            "model": config.model,
+            "prompt": prompt,
+            "stream": True
+        },
+        timeout=(config.connect_timeout, config.read_timeout),
+        stream=True,
+    )
+    text = ""
+    try:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if "error" in chunk:
+                raise RuntimeError(chunk["error"])
+            text += chunk.get("response", "")
+            match = ANSWER_RE.search(text)
+            if match:
+                return match.group(0)
+            if chunk.get("done"):
+                break
+    finally:
+        response.close()
+    return text
+
+
+def generate_with_context(prompt, context=None, config=None, cancel_event=None, deadline=None):
+    """
+    Continue the conversation held in `context` (the token list Ollama
+    returned last time) and return (text, new context).  The context only
+    comes with the final chunk, so a streamed answer is read to the end; the
+    new context is None if that did not happen.
+    """
+    config = config or DEFAULT_CONFIG
+    body = {"model": config.model, "prompt": prompt, "stream": config.stream}
+    if context:
+        body["context"] = context
+    response = get_session().post(
+        config.generate_url,
+        json=body,
+        timeout=(config.connect_timeout, config.read_timeout),
+        stream=config.stream,
+    )
+    try:
+        response.raise_for_status()
+        if not config.stream:
+            data = response.json()
+            return data["response"], data.get("context")
+        text = ""
+        for line in response.iter_lines():
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if "error" in chunk:
+                raise RuntimeError(chunk["error"])
+            text += chunk.get("response", "")
+            if chunk.get("done"):
+                return text, chunk.get("context")
+        return text, None
+    finally:
+        response.close()
+
+
+def _same_move(answer, move):
+    match = ANSWER_RE.search(answer or "")
+    return bool(match) and move.lower().endswith(f"-{match.group(2)}-{match.group(3)}".lower())
+
+
+class LogSession:
+    """
+    The prompts_log conversation kept alive between turns.  The preamble and
+    the moves so far are sent once; later calls send only the moves played
+    since, continuing from the `context` Ollama returned.  If the history no
+    longer extends what the model has seen (undo, restart, or a move other
+    than the model's own answer was played) the context is rebuilt from the
+    full log.
+    """
+
+    def __init__(self, config=None, color="black"):
+        self.config = config or DEFAULT_CONFIG
+        self.color = color
+        self.context = None
+        self.seen = []          # moves the context already contains
+        self.last_answer = None
+        self.rebuilds = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.context = None
+            self.seen = []
+            self.last_answer = None
+
+    def _preamble(self):
+        lines = [line for line in prompts_log if not line.startswith("log #")]
+        return [line.replace("You are black.", f"You are {self.color}.") for line in lines]
+
+    def _new_moves(self, history):
+        """Moves to send on top of the context, or None if it has to be rebuilt."""
+        if self.context is None or history[:len(self.seen)] != self.seen:
+            return None
+        new = history[len(self.seen):]
+        if new and self.last_answer is not None:
+            if not _same_move(self.last_answer, new[0]):
+                return None
+            new = new[1:]     # our own answer is already in the context
+        return new
+
+    def ask(self, history, extra=(), cancel_event=None, deadline=None):
+        """
+        Return the model's answer to the game so far (`history` of
+        "Pawn-e2-e4" strings).  `extra` lines go after the log, e.g. the
+        legal moves or a reminder after a rejected answer.
+        """
+        with self._lock:
+            history = list(history)
+            new = self._new_moves(history)
+            if new is None:
+                self.rebuilds += 1
+                context, start = None, 0
+                lines = self._preamble()
+            else:
+                context, start = self.context, len(history) - len(new)
+                lines = []
+            lines += [f"log #{i}: {move}" for i, move in enumerate(history[start:], start)]
+            lines += list(extra)
+            prompt = "\n".join(lines)
+            self.prompt_chars += len(prompt)
+
+            text, context = generate_with_context(prompt, context, self.config, cancel_event, deadline)
+            if context is None:
+                self.context = None     # cut short: start over next time
+            else:
+                self.context, self.seen, self.last_answer = context, history, text
+            return text
+
+
+class MoveRequest:
+    """
+    Handle for a model answer computed in the background.  Call poll() once
+    per frame: it returns None while the answer is pending and the answer
+    text once it is ready.  If `deadline` seconds pass first, `fallback` (a
+    zero-argument callable, e.g. the local engine) is started instead and its
+    result is returned.  cancel() drops the request; the answer of a call
+    already on the wire is discarded when it arrives.
+    """
+
+    def __init__(self, func, *args, deadline=None, fallback=None, cancel_event=None):
+        self.started = time.perf_counter()
+        self.deadline = self.started + deadline if deadline is not None else None
+        self.fallback = fallback
+        self.used_fallback = False
+        self.cancelled = False
+        self.cancel_event = cancel_event or threading.Event()
+        self.error = None
+        self.answer = None
+        self._done = False
+        self._future = _executor.submit(func, *args)
+
+    def _start_fallback(self):
+        self.cancel_event.set()
+        self._future.cancel()
+        self.used_fallback = True
+        self._future = _executor.submit(self.fallback)
+
+    def poll(self):
+        if self._done or self.cancelled:
+            return self.answer
+        if self._future.done():
+            try:
+                self.answer = self._future.result()
+                self._done = True
+            except Exception as e:
+                self.error = e
+                if self.fallback and not self.used_fallback:
+                    self._start_fallback()
+                else:
+                    self._done = True
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            if self.fallback and not self.used_fallback:
+                self._start_fallback()
+            elif not self.fallback:
+                self.error = TimeoutError("model did not answer before the deadline")
+                self.cancel_event.set()
+                self._future.cancel()
+                self._done = True
+        return self.answer
+
+    def done(self):
+        self.poll()
+        return self._done or self.cancelled
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def cancel(self):
+        self.cancelled = True
+        self.cancel_event.set()
+        self._future.cancel()
+
+
+def request_ai_answer(board, config=None, deadline=None, fallback=None, color="white", state=None):
+    """Start get_ai_answer on a worker thread and return a MoveRequest to poll."""
+    snapshot = [list(row) for row in board]
+    state = dict(state) if state is not None else None
+    cancel_event = threading.Event()
+    return MoveRequest(get_ai_answer, snapshot, config, RESPONSE_CACHE, cancel_event, color, state,
+                       deadline=deadline, fallback=fallback, cancel_event=cancel_event)
@@ -0,0 +1,164 @@
+"""
+Move selection on top of a model backend.
+
+The prompt lists every legal move and the answer is only accepted if it
+names one of them.  Bad answers are retried with a reminder, but never more
+than `max_attempts` times or past `time_budget` seconds; after that the
+fallback (the local engine) picks the move, so a misbehaving model can not
+hang the game.  Every attempt is recorded with its latency and why it was
+rejected.
+"""
+import dataclasses
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+from model.ollama import (
+    DEFAULT_CONFIG, RESPONSE_CACHE, MoveRequest, encode_board, generate, prompt_version,
+)
+
+# "Pawn-e2-e4" style first, bare squares ("e2e4", "e2-e4", "e2 to e4") second
+PIECE_MOVE_RE = re.compile(r"\b(?:pawn|knight|bishop|rook|queen|king)-([a-h][1-8])-([a-h][1-8])\b", re.IGNORECASE)
+SQUARE_MOVE_RE = re.compile(r"\b([a-h][1-8])(?:\s*-\s*|\s+to\s+|\s*)([a-h][1-8])\b", re.IGNORECASE)
+
+
+def pipeline_prompt_version(prompt_format="board"):
+    # cached answers for this prompt must not mix with the plain board prompt
+    return f"{prompt_version(prompt_format)}-legal"
+
+
+@dataclass
+class Attempt:
+    number: int
+    latency: float                  # seconds
+    answer: str = ""
+    reason: str = None              # None when the answer was accepted
+
+
+@dataclass
+class Selection:
+    move: str                       # "Pawn-e2-e4", None if even the fallback had nothing
+    source: str                     # "model", "cache" or "engine"
+    attempts: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self):
+        parts = [f"{a.latency * 1000:.0f}ms {a.reason or 'ok'}" for a in self.attempts]
+        return f"{self.move} from {self.source} in {self.elapsed:.2f}s [{', '.join(parts)}]"
+
+
+def match_legal_move(text, legal_moves):
+    """
+    Return the first move in `text` that is in `legal_moves` (strings like
+    "Pawn-e2-e4"), or None.  Squares decide; the piece name the model gave
+    is not trusted.
+    """
+    by_squares = {}
+    for move in legal_moves:
+        _, from_pos, to_pos = move.split("-")
+        by_squares.setdefault((from_pos.lower(), to_pos.lower()), move)
+    for pattern in (PIECE_MOVE_RE, SQUARE_MOVE_RE):
+        for match in pattern.finditer(text or ""):
+            move = by_squares.get((match.group(1).lower(), match.group(2).lower()))
+            if move:
+                return move
+    return None
+
+
+def build_prompt(board, legal_moves, color, rejected=(), prompt_format="board"):
+    lines = [
+        "You will play the chess. I will give the board and you return the best move.",
+        f"You are {color}",
+    ]
+    lines += encode_board(board, prompt_format, color)
+    lines.append("Your legal moves are: " + ", ".join(legal_moves))
+    if rejected:
+        lines.append("These answers were not legal moves: " + ", ".join(rejected))
+    lines.append("Answer with exactly one move from the list, in the format <piece>-<from>-<to>, and nothing else.")
+    return "\n".join(lines)
+
+
+def select_move(board, legal_moves, color, fallback=None, config=None, max_attempts=3,
+                time_budget=15.0, cancel_event=None, cache=RESPONSE_CACHE, ask=None):
+    """
+    Ask the model for one of `legal_moves` and return a Selection.  Retries
+    at most `max_attempts` times within `time_budget` seconds, then calls
+    `fallback()` (returns a move string) if one is given.  `ask(rejected,
+    config, cancel_event, deadline)` replaces the default board prompt.
+    """
+    config = config or DEFAULT_CONFIG
+    started = time.perf_counter()
+    deadline = started + time_budget
+    legal_moves = list(dict.fromkeys(legal_moves))     # promotions share a string
+    if ask is None:
+        def ask(rejected, config, cancel_event, deadline):
+            prompt = build_prompt(board, legal_moves, color, rejected, config.prompt_format)
+            return generate(prompt, config, cancel_event, deadline)
+    selection = Selection(None, "engine")
+
+    key = None
+    if cache is not None:
+        key = cache.make_key(board, config.model, pipeline_prompt_version(config.prompt_format),
+                             config.host, color)
+        cached = match_legal_move(cache.get(key), legal_moves)
+        if cached:
+            selection.move, selection.source = cached, "cache"
+            selection.elapsed = time.perf_counter() - started
+            return selection
+
+    rejected = []
+    for number in range(1, max_attempts + 1):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0 or (cancel_event is not None and cancel_event.is_set()):
+            break
+        attempt = Attempt(number, 0.0)
+        attempt_config = dataclasses.replace(config, read_timeout=min(config.read_timeout, remaining))
+        sent = time.perf_counter()
+        try:
+            attempt.answer = ask(rejected, attempt_config, cancel_event, deadline)
+            move = match_legal_move(attempt.answer, legal_moves)
+            if move is None:
+                attempt.reason = "empty answer" if not attempt.answer.strip() else "not a legal move"
+                rejected.append(attempt.answer.strip()[:40])
+        except Exception as e:
+            move = None
+            attempt.reason = f"{type(e).__name__}: {e}"
+        attempt.latency = time.perf_counter() - sent
+        selection.attempts.append(attempt)
+        if move:
+            selection.move, selection.source = move, "model"
+            if cache is not None:
+                cache.put(key, move)
+            break
+
+    if selection.move is None and fallback is not None and not (cancel_event and cancel_event.is_set()):
+        selection.move = fallback()
+    selection.elapsed = time.perf_counter() - started
+    return selection
+
+
+def request_move(board, legal_moves, color, fallback=None, config=None, max_attempts=3, time_budget=15.0):
+    """Run select_move on a worker thread; poll the returned MoveRequest for the Selection."""
+    snapshot = [list(row) for row in board]
+    cancel_event = threading.Event()
+    return MoveRequest(select_move, snapshot, list(legal_moves), color, fallback, config,
+                       max_attempts, time_budget, cancel_event, cancel_event=cancel_event)
+
+
+def request_log_move(session, history, legal_moves, color, fallback=None, max_attempts=3, time_budget=15.0):
+    """
+    Like request_move, but the model is asked through a LogSession with the
+    move log instead of the board, so only new moves are sent each turn.
+    """
+    history, legal_moves = list(history), list(dict.fromkeys(legal_moves))
+    cancel_event = threading.Event()
+
+    def ask(rejected, config, cancel_event, deadline):
+        extra = ["Your legal moves are: " + ", ".join(legal_moves)]
+        if rejected:
+            extra.append("These answers were not legal moves: " + ", ".join(rejected))
+        return session.ask(history, extra, cancel_event, deadline)
+
+    return MoveRequest(select_move, None, legal_moves, color, fallback, session.config,
+                       max_attempts, time_budget, cancel_event, None, ask, cancel_event=cancel_event)
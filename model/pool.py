@@ -0,0 +1,145 @@
+"""
+Hedged model queries: the same position goes to every backend of a pool at
+once, the first legal answer wins and the others are cancelled.  Each
+backend keeps its own win count and latency so slow or unreliable ones show
+up in stats().
+"""
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import replace
+
+from model.ollama import RESPONSE_CACHE, MoveRequest, generate
+from model.pipeline import build_prompt, match_legal_move, select_move
+
+
+class Backend:
+    """One model at one endpoint, with its running stats."""
+
+    def __init__(self, config, name=None):
+        self.config = config
+        self.name = name or f"{config.model}@{config.host}"
+        self.requests = 0
+        self.wins = 0
+        self.errors = 0
+        self.illegal = 0
+        self.latencies = deque(maxlen=200)      # seconds, answered requests only
+
+    @property
+    def win_rate(self):
+        return self.wins / self.requests if self.requests else 0.0
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            "name": self.name,
+            "requests": self.requests,
+            "wins": self.wins,
+            "win_rate": self.win_rate,
+            "errors": self.errors,
+            "illegal": self.illegal,
+            "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+            "mean_ms": statistics.fmean(latencies) * 1000 if latencies else None,
+        }
+
+
+class BackendPool:
+    def __init__(self, configs):
+        if not configs:
+            raise ValueError("a backend pool needs at least one config")
+        self.backends = [Backend(config) for config in configs]
+        # losers still waiting on a non-streamed answer hold their worker until
+        # it arrives, so leave room for a few rounds of them
+        self._executor = ThreadPoolExecutor(max_workers=len(self.backends) * 4, thread_name_prefix="ollama-hedge")
+        self._lock = threading.Lock()
+
+    @property
+    def config(self):
+        """Config standing for the whole pool, e.g. for cache keys."""
+        first = self.backends[0].config
+        return replace(first, model="+".join(b.config.model for b in self.backends))
+
+    def _query(self, backend, prompt, cancel_event, deadline):
+        started = time.perf_counter()
+        answer = generate(prompt, backend.config, cancel_event, deadline)
+        return answer, time.perf_counter() - started
+
+    def ask(self, board, legal_moves, color, rejected=(), cancel_event=None, deadline=None):
+        """
+        Send the position to every backend and return the first answer that
+        matches `legal_moves`, or the last answer received if none does.
+        Setting `cancel_event` cancels all of them.
+        """
+        events = {}
+        futures = {}
+        for backend in self.backends:
+            event = threading.Event()
+            prompt = build_prompt(board, legal_moves, color, rejected, backend.config.prompt_format)
+            future = self._executor.submit(self._query, backend, prompt, event, deadline)
+            events[backend] = event
+            futures[future] = backend
+            with self._lock:
+                backend.requests += 1
+
+        answer, pending, failed = "", set(futures), 0
+        try:
+            while pending:
+                # short waits so cancel_event and the deadline are noticed
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    backend = futures[future]
+                    try:
+                        text, latency = future.result()
+                    except Exception:
+                        failed += 1
+                        with self._lock:
+                            backend.errors += 1
+                        continue
+                    with self._lock:
+                        backend.latencies.append(latency)
+                    answer = text
+                    if match_legal_move(text, legal_moves):
+                        with self._lock:
+                            backend.wins += 1
+                        return text
+                    with self._lock:
+                        backend.illegal += 1
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+            if failed == len(futures):
+                raise ConnectionError("every backend failed")
+            return answer
+        finally:
+            # losers stop reading their stream at the next chunk
+            for event in events.values():
+                event.set()
+            for future in pending:
+                future.cancel()
+
+    def stats(self):
+        return [backend.stats() for backend in self.backends]
+
+    def report(self):
+        lines = []
+        for row in self.stats():
+            p50 = f"{row['p50_ms']:.0f}ms" if row["p50_ms"] is not None else "-"
+            lines.append(f"{row['name']}: {row['wins']}/{row['requests']} wins, p50 {p50}, "
+                         f"{row['errors']} errors, {row['illegal']} illegal")
+        return "\n".join(lines)
+
+
+def request_pool_move(pool, board, legal_moves, color, fallback=None, max_attempts=3, time_budget=15.0):
+    """Like pipeline.request_move, but every attempt is hedged across `pool`."""
+    snapshot = [list(row) for row in board]
+    legal_moves = list(dict.fromkeys(legal_moves))
+    cancel_event = threading.Event()
+
+    def ask(rejected, config, cancel_event, deadline):
+        return pool.ask(snapshot, legal_moves, color, rejected, cancel_event, deadline)
+
+    return MoveRequest(select_move, snapshot, legal_moves, color, fallback, pool.config,
+                       max_attempts, time_budget, cancel_event, RESPONSE_CACHE, ask, cancel_event=cancel_event)
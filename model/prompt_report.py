@@ -0,0 +1,47 @@
+"""
+Prompt size and latency of each PROMPT_FORMATS encoding, measured against
+the local stand-in server.
+
+    python -m model.prompt_report                 # every format, perft positions
+    python -m model.prompt_report -n 20 --prompt-ms 0.5
+"""
+import argparse
+import statistics
+import sys
+import time
+from dataclasses import replace
+
+from model.mock_server import MockOllama, count_tokens
+from model.ollama import DEFAULT_CONFIG, PROMPT_FORMATS, build_board_prompt, get_ai_answer
+from perft import POSITIONS, board_from_fen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare prompt encodings")
+    parser.add_argument("-n", "--iterations", type=int, default=10, help="requests per format and position")
+    parser.add_argument("--prompt-ms", type=float, default=0.2, help="simulated milliseconds per prompt token")
+    parser.add_argument("--stream", action="store_true", help="use the streaming client path")
+    args = parser.parse_args(argv)
+
+    positions = [board_from_fen(fen) for fen, _ in POSITIONS.values()]
+    print(f"{'format':<10}{'chars':>8}{'tokens':>8}{'mean ms':>10}{'p50 ms':>10}{'vs board':>10}")
+    baseline = None
+    with MockOllama(prompt_ms=args.prompt_ms) as mock:
+        for prompt_format in PROMPT_FORMATS:
+            config = replace(DEFAULT_CONFIG, host=mock.url, stream=args.stream, prompt_format=prompt_format)
+            prompts = [build_board_prompt(board, prompt_format, state["turn"], state) for board, state in positions]
+            times = []
+            for _ in range(args.iterations):
+                for board, state in positions:
+                    started = time.perf_counter()
+                    get_ai_answer(board, config, cache=None, color=state["turn"], state=state)
+                    times.append((time.perf_counter() - started) * 1000)
+            tokens = statistics.fmean(count_tokens(p) for p in prompts)
+            baseline = baseline or tokens
+            print(f"{prompt_format:<10}{statistics.fmean(len(p) for p in prompts):>8.0f}{tokens:>8.0f}"
+                  f"{statistics.fmean(times):>10.1f}{statistics.median(times):>10.1f}{tokens / baseline:>10.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
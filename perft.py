@@ -0,0 +1,133 @@
+"""
+Perft: count the leaf nodes of the legal move tree and check them against
+published reference counts.
+
+    python -m perft                      # every position, up to depth 3
+    python -m perft -d 4 -p kiwipete     # one position, deeper
+    python -m perft --board              # go through chessMove on the list board, as the GUI does
+    python -m perft --divide -p start    # per-root-move counts for debugging
+
+Exits with status 1 if any count differs from the reference.
+"""
+import argparse
+import sys
+import time
+
+from chessPosition import Position, START_FEN
+from chessMove import generate_legal_moves, make_move, unmake_move
+
+# name -> (FEN, node counts for depth 1, 2, ...)
+POSITIONS = {
+    "start": (START_FEN, (20, 400, 8902, 197281, 4865609)),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                 (48, 2039, 97862, 4085603)),
+    "endgame": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                (14, 191, 2812, 43238, 674624)),
+    "promotion": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                  (6, 264, 9467, 422333)),
+    "pins": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+             (44, 1486, 62379, 2103487)),
+    "middlegame": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+                   (46, 2079, 89890, 3894594)),
+}
+
+
+def perft(position, depth):
+    moves = position.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move()
+    return nodes
+
+
+def perft_board(board, state, depth):
+    """Same count through chessMove on the list-of-lists board."""
+    moves = generate_legal_moves(board, state)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        undo = make_move(board, move, state)
+        nodes += perft_board(board, state, depth - 1)
+        unmake_move(board, undo, state)
+    return nodes
+
+
+def board_from_fen(fen):
+    position = Position.from_fen(fen)
+    state = {
+        "turn": position.color_to_move(),
+        "castling": position.castling_rights(),
+        "enPassant": position.en_passant(),
+    }
+    return position.to_board(), state
+
+
+def divide(fen, depth, use_board=False):
+    """Print the node count below each root move."""
+    total = 0
+    if use_board:
+        board, state = board_from_fen(fen)
+        for move in generate_legal_moves(board, state):
+            undo = make_move(board, move, state)
+            count = perft_board(board, state, depth - 1) if depth > 1 else 1
+            unmake_move(board, undo, state)
+            print(f"{move}{'=' + move.promotion if move.promotion else ''}: {count}")
+            total += count
+    else:
+        position = Position.from_fen(fen)
+        for move in position.legal_moves():
+            position.make_move(move)
+            count = perft(position, depth - 1) if depth > 1 else 1
+            position.unmake_move()
+            print(f"{move}{'=' + move.promotion if move.promotion else ''}: {count}")
+            total += count
+    print(f"total: {total}")
+    return total
+
+
+def run(names, max_depth, use_board=False):
+    """Run every position up to `max_depth`; return True if all counts match."""
+    ok = True
+    print(f"{'position':<12}{'depth':>6}{'nodes':>12}{'expected':>12}{'seconds':>10}{'nps':>12}")
+    for name in names:
+        fen, expected = POSITIONS[name]
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            started = time.perf_counter()
+            if use_board:
+                board, state = board_from_fen(fen)
+                nodes = perft_board(board, state, depth)
+            else:
+                nodes = perft(Position.from_fen(fen), depth)
+            elapsed = time.perf_counter() - started
+            nps = int(nodes / elapsed) if elapsed > 0 else 0
+            mark = "" if nodes == expected[depth - 1] else "  MISMATCH"
+            ok = ok and not mark
+            print(f"{name:<12}{depth:>6}{nodes:>12}{expected[depth - 1]:>12}{elapsed:>10.3f}{nps:>12}{mark}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move generator perft check")
+    parser.add_argument("-d", "--depth", type=int, default=3)
+    parser.add_argument("-p", "--position", choices=sorted(POSITIONS), action="append",
+                        help="position to run (repeatable, default: all)")
+    parser.add_argument("--board", action="store_true",
+                        help="use the list-of-lists board and chessMove.make_move")
+    parser.add_argument("--divide", action="store_true",
+                        help="print per-move counts for the first position instead")
+    args = parser.parse_args(argv)
+
+    names = args.position or list(POSITIONS)
+    if args.divide:
+        divide(POSITIONS[names[0]][0], args.depth, args.board)
+        return 0
+    return 0 if run(names, args.depth, args.board) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,53 @@
+COLORS = ("white", "black")
+KINDS = ("pawn", "knight", "bishop", "rook", "queen", "king")
+
+__all__ = ["Piece", "PIECES", "COLORS", "KINDS"]
+
+
 class Piece:
-    def __init__(self, color, kind):
-        self.color = color            # 'white' or 'black'
-        self.kind = kind              # 'pawn', 'rook', etc.
-        self.has_moved = False        # for king, rook, and castling
-        self.double_move_turn = -1    # for pawn's en passant
+    """
+    Immutable piece.  There is one shared instance per (color, kind), so
+    Piece("white", "pawn") always returns the same object and copying a
+    board only copies its rows.  Whether a king or rook has moved and which
+    pawn may be taken en passant is kept in the game state ("castling",
+    "enPassant"), not on the piece.
+    """
+    __slots__ = ("color", "kind", "code")
+    _instances = {}
+
+    def __new__(cls, color, kind):
+        try:
+            return cls._instances[color, kind]
+        except KeyError:
+            raise ValueError(f"no such piece: {color}-{kind}") from None
+
+    @classmethod
+    def _create(cls, color, kind):
+        piece = object.__new__(cls)
+        object.__setattr__(piece, "color", color)        # 'white' or 'black'
+        object.__setattr__(piece, "kind", kind)          # 'pawn', 'rook', etc.
+        object.__setattr__(piece, "code", COLORS.index(color) * 6 + KINDS.index(kind))
+        cls._instances[color, kind] = piece
+        return piece
+
+    def __setattr__(self, name, value):
+        raise AttributeError("pieces are shared and can not be changed")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return Piece, (self.color, self.kind)
 
     def __str__(self):
         return f"{self.color}-{self.kind}"
 
     def __repr__(self):
         return str(self)
+
+
+# indexed by Piece.code = color * 6 + kind, as in chessPosition
+PIECES = tuple(Piece._create(color, kind) for color in COLORS for kind in KINDS)
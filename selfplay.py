@@ -0,0 +1,191 @@
+"""
+Headless self-play: games between the engine, the model and a random mover
+with no window, as fast as the players move.
+
+    python -m selfplay -n 200 -j 4                          # engine vs engine on 4 processes
+    python -m selfplay --white engine:depth=4 --black engine:nodes=2000 --alternate
+    python -m selfplay --white engine:time=200 --black model:llama3.2 -n 10
+    python -m selfplay -n 1000 --black random -o games.jsonl
+
+A player is `engine[:depth=N,nodes=N,time=MS,book=0]`, `random` or
+`model[:MODEL]` (asks Ollama, falling back to a quick engine search).
+Each game opens with `--random-plies` random moves so repeated engine games
+differ; `--max-plies` ends endless games as draws.  With `--alternate` the
+players swap colours every game and the summary scores each player, not
+each colour.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from chessAI import chessMoveAI, SearchLimits
+from game import Game
+
+SCORES = {"1-0": (1.0, 0.0), "0-1": (0.0, 1.0), "1/2-1/2": (0.5, 0.5)}
+
+
+def parse_player(spec):
+    """("engine", {...}) / ("random", {}) / ("model", {"model": ...}) from a player spec."""
+    kind, _, arg = spec.partition(":")
+    if kind == "engine":
+        options = {}
+        for item in filter(None, arg.split(",")):
+            key, _, value = item.partition("=")
+            if key not in ("depth", "nodes", "time", "book"):
+                raise ValueError(f"unknown engine option: {key}")
+            options[key] = int(value)
+        return kind, options
+    if kind == "random":
+        return kind, {}
+    if kind == "model":
+        return kind, {"model": arg} if arg else {}
+    raise ValueError(f"unknown player: {spec}")
+
+
+def make_player(spec, rng):
+    """Return `move(game) -> move string` for a player spec."""
+    kind, options = parse_player(spec)
+    if kind == "random":
+        return lambda game: str(rng.choice(game.legal_moves()))
+
+    if kind == "engine":
+        # with no limit given, a fixed shallow depth keeps games fast and repeatable
+        limited = "time" in options or "nodes" in options
+        limits = SearchLimits(time_ms=options.get("time"), nodes=options.get("nodes"),
+                              depth=options.get("depth", 32 if limited else 3))
+        use_book = bool(options.get("book", 1))
+        return lambda game: chessMoveAI(game.board, game.turn, limits, game.state, use_book=use_book, verbose=False)
+
+    # only model games need the HTTP client
+    from model.ollama import OllamaConfig
+    from model.pipeline import select_move
+
+    config = OllamaConfig(**options)
+    fallback_limits = SearchLimits(time_ms=200)
+
+    def move(game):
+        board, state, color = [row[:] for row in game.board], dict(game.state), game.turn
+        fallback = lambda: chessMoveAI(board, color, fallback_limits, state, verbose=False)
+        return select_move(game.board, [str(m) for m in game.legal_moves()], game.turn,
+                           fallback=fallback, config=config).move
+    return move
+
+
+def play_game(white, black, seed=None, random_plies=4, max_plies=300, clock=None):
+    """
+    Play one game between two player specs.  Returns a dict with the
+    result, how it ended, the moves and the time each side used.
+    """
+    rng = random.Random(seed)
+    game = Game(clock=clock)
+    players = {"white": make_player(white, rng), "black": make_player(black, rng)}
+    thinking = Counter()
+    plies = 0
+    while not game.game_over:
+        if plies >= max_plies:
+            game.adjudicate("1/2-1/2", "Draw: move limit")
+            break
+        color = game.turn
+        started = time.perf_counter()
+        if plies < random_plies:
+            move = rng.choice(game.legal_moves())
+        else:
+            move = game.find_move(players[color](game))
+        elapsed = time.perf_counter() - started
+        thinking[color] += elapsed
+        game.tick(elapsed)
+        if game.game_over:
+            break
+        if move is None:
+            # a player that answers with no legal move forfeits
+            game.adjudicate("0-1" if color == "white" else "1-0", f"{color.capitalize()} made an illegal move")
+            break
+        game.play(move)
+        plies += 1
+    return {
+        "white": white,
+        "black": black,
+        "seed": seed,
+        "result": game.result,
+        "reason": game.result_message,
+        "plies": plies,
+        "moves": game.move_log(),
+        "thinking": {color: round(seconds, 3) for color, seconds in thinking.items()},
+    }
+
+
+def _play(job):
+    return play_game(**job)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play games with no display")
+    parser.add_argument("-n", "--games", type=int, default=10)
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="games played in parallel processes")
+    parser.add_argument("--white", default="engine")
+    parser.add_argument("--black", default="engine")
+    parser.add_argument("--alternate", action="store_true", help="swap colours every game")
+    parser.add_argument("--random-plies", type=int, default=4)
+    parser.add_argument("--max-plies", type=int, default=300)
+    parser.add_argument("--clock", type=float, help="seconds per side; untimed if left out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write every game as a JSON line")
+    args = parser.parse_args(argv)
+
+    for spec in (args.white, args.black):
+        try:
+            parse_player(spec)
+        except ValueError as e:
+            parser.error(str(e))
+
+    jobs = []
+    for i in range(args.games):
+        white, black = (args.black, args.white) if args.alternate and i % 2 else (args.white, args.black)
+        jobs.append(dict(white=white, black=black, seed=args.seed + i, random_plies=args.random_plies,
+                         max_plies=args.max_plies, clock=args.clock))
+
+    started = time.perf_counter()
+    results, points, reasons = [], Counter(), Counter()
+    out = open(args.output, "w") if args.output else None
+    try:
+        if args.jobs > 1:
+            executor = ProcessPoolExecutor(args.jobs)
+            games = executor.map(_play, jobs)
+        else:
+            executor = None
+            games = map(_play, jobs)
+        for i, game in enumerate(games, 1):
+            results.append(game)
+            white_points, black_points = SCORES[game["result"]]
+            points[game["white"]] += white_points
+            points[game["black"]] += black_points
+            reasons[game["reason"]] += 1
+            print(f"game {i}: {game['white']} - {game['black']} {game['result']} "
+                  f"({game['reason']}, {game['plies']} plies)")
+            if out:
+                out.write(json.dumps(game) + "\n")
+        if executor is not None:
+            executor.shutdown()
+    finally:
+        if out:
+            out.close()
+
+    seconds = time.perf_counter() - started
+    plies = sum(game["plies"] for game in results)
+    print(f"\n{len(results)} games, {plies} plies in {seconds:.1f}s ({plies / seconds:.0f} plies/s)")
+    white_points = sum(SCORES[game["result"]][0] for game in results)
+    print(f"  white: {white_points:g}/{len(results)}")
+    for player in dict.fromkeys((args.white, args.black)):
+        played = sum(1 for game in results if player in (game["white"], game["black"]))
+        print(f"  {player}: {points[player]:g}/{played}")
+    for reason, count in reasons.most_common():
+        print(f"  {reason}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())